@@ -0,0 +1,43 @@
+/*
+  Counting wrapper around the Python object allocator, used by the cwrap
+  benchmarks to count the allocations of a piece of Python code; it is
+  compiled against the interpreter headers when the benchmarks run, see
+  build_library() in common.py. Load it with the GIL held, i.e. as a PyDLL.
+*/
+
+#include <Python.h>
+
+static PyMemAllocatorEx original;
+static size_t allocations = 0;
+
+static void * counting_malloc(void * ctx, size_t size) {
+  allocations++;
+  return original.malloc(original.ctx, size);
+}
+
+static void * counting_calloc(void * ctx, size_t nelem, size_t elsize) {
+  allocations++;
+  return original.calloc(original.ctx, nelem, elsize);
+}
+
+static void * counting_realloc(void * ctx, void * ptr, size_t new_size) {
+  if (ptr == NULL)
+    allocations++;
+  return original.realloc(original.ctx, ptr, new_size);
+}
+
+static void counting_free(void * ctx, void * ptr) {
+  original.free(original.ctx, ptr);
+}
+
+void allocations_start(void) {
+  PyMemAllocatorEx counting = {NULL, counting_malloc, counting_calloc, counting_realloc, counting_free};
+  PyMem_GetAllocator(PYMEM_DOMAIN_OBJ, &original);
+  allocations = 0;
+  PyMem_SetAllocator(PYMEM_DOMAIN_OBJ, &counting);
+}
+
+size_t allocations_stop(void) {
+  PyMem_SetAllocator(PYMEM_DOMAIN_OBJ, &original);
+  return allocations;
+}
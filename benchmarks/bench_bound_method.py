@@ -0,0 +1,96 @@
+"""Bound prototype calls: descriptor binding vs. installed methods.
+
+A bound prototype looked up through Prototype.__get__ allocates a new bound
+method object every time `obj._len()` is evaluated. With PROTOTYPE_METHODS the
+specialized call target is a plain function in the class namespace, which
+CPython calls through its method call fast path without creating a bound
+method object at all. The accessor loop mirrors ExVecstr.__iter__ in
+examples/vecstr.
+
+The allocations per call are counted by a wrapper around the Python object
+allocator, see allocations.c; they are skipped when no C compiler is
+available.
+"""
+
+import itertools
+
+from common import ALLOCATIONS, ALLOCATIONS_SOURCE, LibcPrototype, build_library, measure, report
+
+from cwrap import BaseCClass, Prototype, load
+
+
+class DescriptorString(BaseCClass):
+    TYPE_NAME = "bench_descriptor_string"
+
+    _alloc = LibcPrototype("void* strdup(char*)")
+    _len = LibcPrototype("size_t strlen(bench_descriptor_string)", bind=True)
+    _free = LibcPrototype("void free(bench_descriptor_string)", bind=True)
+
+    def __init__(self, text):
+        super(DescriptorString, self).__init__(self._alloc(text))
+
+    def __iter__(self):
+        idx = 0
+        while idx < self._len():
+            yield idx
+            idx += 1
+
+    def free(self):
+        self._free()
+
+
+class MethodString(DescriptorString):
+    TYPE_NAME = "bench_method_string"
+    PROTOTYPE_METHODS = True
+
+    _len = LibcPrototype("size_t strlen(bench_method_string)", bind=True)
+
+
+def allocation_counter():
+    """Return a function counting the allocations of func(), or None."""
+    directory = build_library(name=ALLOCATIONS, source=ALLOCATIONS_SOURCE, python=True)
+    if directory is None:
+        return None
+
+    lib = load(ALLOCATIONS, path=directory, gil="hold")
+    start = Prototype(lib, "void allocations_start()")
+    stop = Prototype(lib, "size_t allocations_stop()")
+
+    def count(func, number=10000):
+        # Calls through the prototypes themselves allocate; subtract the
+        # count of an empty loop.
+        counts = []
+        for body in (func, lambda: None):
+            start()
+            for _ in itertools.repeat(None, number):
+                body()
+            counts.append(stop())
+        return float(counts[0] - counts[1]) / number
+
+    return count
+
+
+def run():
+    text = "x" * 100
+    results = {}
+    count = allocation_counter()
+    for cls in (DescriptorString, MethodString):
+        obj = cls(text)
+        results["%s._len()" % cls.__name__] = measure(lambda: obj._len())
+        results["%s iteration, per item" % cls.__name__] = (
+            measure(lambda: sum(1 for _ in obj), number=1000) / len(text)
+        )
+        if count is not None:
+            results["%s._len() allocations per call" % cls.__name__] = count(lambda: obj._len())
+    return results
+
+
+if __name__ == "__main__":
+    results = run()
+    allocations = {name: value for name, value in results.items() if "allocations" in name}
+    report(
+        __doc__.splitlines()[0],
+        {name: value for name, value in results.items() if name not in allocations},
+    )
+    if allocations:
+        report("Python object allocations", allocations, unit="")
@@ -0,0 +1,161 @@
+"""FFI hot paths: calls, conversions, wrappers, enums, loading and files.
+
+Runs against libc and against benchlib.c, a small C library compiled when
+the benchmark starts; the benchlib cases are skipped when no C compiler is
+available.
+"""
+
+import ctypes
+import os
+import tempfile
+import timeit
+
+from common import BENCHLIB, LibcPrototype, build_library, measure, report
+
+import cwrap
+from cwrap import BaseCClass, BaseCEnum, Prototype, load
+
+
+class StringHolder(BaseCClass):
+    TYPE_NAME = "bench_string_holder"
+
+    _alloc = LibcPrototype("void* strdup(char*)")
+    _len = LibcPrototype("size_t strlen(bench_string_holder)", bind=True)
+    _free = LibcPrototype("void free(bench_string_holder)", bind=True)
+
+    def __init__(self, text):
+        super(StringHolder, self).__init__(self._alloc(text))
+
+    def free(self):
+        self._free()
+
+
+class Borrowed(BaseCClass):
+    """Wraps memory owned by somebody else; free() is a no-op."""
+
+    TYPE_NAME = "bench_borrowed"
+
+    def free(self):
+        pass
+
+
+class Permission(BaseCEnum):
+    TYPE_NAME = "bench_permission"
+    NONE = None
+    READ = None
+    WRITE = None
+    EXECUTE = None
+
+
+Permission.addEnum("NONE", 0)
+Permission.addEnum("READ", 1)
+Permission.addEnum("WRITE", 2)
+Permission.addEnum("EXECUTE", 4)
+
+
+def libc_cases():
+    labs = LibcPrototype("long labs(long)")
+    strlen = LibcPrototype("size_t strlen(char*)")
+    getenv = LibcPrototype("char* getenv(char*)")
+    holder = StringHolder("x" * 32)
+    os.environ.setdefault("CWRAP_BENCHMARK", "value")
+
+    storage = StringHolder("borrowed")
+    address = storage._address()
+
+    filename = os.path.join(tempfile.gettempdir(), "cwrap-benchmark.txt")
+
+    frexp = LibcPrototype("double frexp(double, int*)")
+    frexp_out = LibcPrototype("double frexp(double, out int*)")
+
+    def frexp_byref():
+        exponent = ctypes.c_int()
+        return frexp(8.0, ctypes.byref(exponent)), exponent.value
+
+    def open_close():
+        f = cwrap.open(filename, "w")
+        f.close()
+
+    return {
+        "unbound call labs()": lambda: labs(-1),
+        "bound call strlen(obj)": lambda: holder._len(),
+        "char* argument strlen()": lambda: strlen("benchmark"),
+        "char* return getenv()": lambda: getenv("CWRAP_BENCHMARK"),
+        "createPythonObject": lambda: Borrowed.createPythonObject(address),
+        "createCReference": lambda: Borrowed.createCReference(address, parent=storage),
+        "enum lookup by value": lambda: Permission(2),
+        "enum lookup by name": lambda: Permission.from_string("WRITE"),
+        "enum bitwise or": lambda: Permission.READ | Permission.WRITE,
+        "enum contains": lambda: Permission.READ in (Permission.READ | Permission.WRITE),
+        "CWrapFile open/close": (open_close, 10000),
+        "out int*, byref at the call site": frexp_byref,
+        "out int*, output argument": lambda: frexp_out(8.0),
+    }
+
+
+def benchlib_cases(directory):
+    lib = load(BENCHLIB, path=directory)
+
+    class BenchPrototype(Prototype):
+        def __init__(self, prototype, bind=False):
+            super(BenchPrototype, self).__init__(lib, prototype, bind=bind)
+
+    class Node(BaseCClass):
+        TYPE_NAME = "bench_node"
+
+        _alloc = BenchPrototype("void* node_alloc(int, int)")
+        _free = BenchPrototype("void node_free(bench_node)", bind=True)
+        _value = BenchPrototype("int node_get_value(bench_node)", bind=True)
+        _name = BenchPrototype("char* node_get_name(bench_node)", bind=True)
+        _size = BenchPrototype("int node_get_size(bench_node)", bind=True)
+        _child = BenchPrototype("bench_node_ref node_iget_child(bench_node, int)", bind=True)
+
+        def __init__(self, value, num_children):
+            super(Node, self).__init__(self._alloc(value, num_children))
+
+        def children(self):
+            return [self._child(index) for index in range(self._size())]
+
+        def free(self):
+            self._free()
+
+    noop = BenchPrototype("int bench_noop()")
+    add = BenchPrototype("int bench_add(int, int)")
+    node = Node(1, 100)
+
+    return {
+        "benchlib noop()": lambda: noop(),
+        "benchlib add(int, int)": lambda: add(1, 2),
+        "benchlib bound node_get_value()": lambda: node._value(),
+        "benchlib char* return node_get_name()": lambda: node._name(),
+        "benchlib createCReference (100 children)": (node.children, 1000),
+        "benchlib create and free node": (lambda: Node(1, 0), 10000),
+    }
+
+
+def load_time(directory):
+    """Time of clib.load() for an already mapped library."""
+    timer = timeit.Timer(lambda: load(BENCHLIB, path=directory))
+    return min(timer.repeat(repeat=7, number=1000)) / 1000 * 1e9
+
+
+def run():
+    cases = libc_cases()
+    results = {}
+
+    directory = build_library()
+    if directory is not None:
+        cases.update(benchlib_cases(directory))
+        results["clib.load()"] = load_time(directory)
+
+    for name, case in cases.items():
+        if isinstance(case, tuple):
+            func, number = case
+            results[name] = measure(func, number=number)
+        else:
+            results[name] = measure(case)
+    return results
+
+
+if __name__ == "__main__":
+    report(__doc__.splitlines()[0], run())
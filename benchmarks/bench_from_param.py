@@ -0,0 +1,72 @@
+"""Argument conversion of BaseCClass objects in prototype calls.
+
+With CACHE_C_PARAM, BaseCClass.from_param() returns a c_void_p which is
+created once per object and reused for later calls; by default, and for
+OldParam which converts like earlier cwrap versions, a new c_void_p is
+allocated for every argument of every call. Uses functions with 1, 2 and 4
+pointer arguments from benchlib.c; bench_memory.py has the memory cost of
+the cached c_void_p.
+"""
+
+import ctypes
+
+from common import BENCHLIB, build_library, measure, report
+
+from cwrap import BaseCClass, Prototype, load
+
+
+class DefaultParam(BaseCClass):
+    TYPE_NAME = "bench_default_param"
+
+    def free(self):
+        pass
+
+
+class CachedParam(BaseCClass):
+    TYPE_NAME = "bench_cached_param"
+    CACHE_C_PARAM = True
+
+    def free(self):
+        pass
+
+
+class OldParam(BaseCClass):
+    TYPE_NAME = "bench_old_param"
+
+    @classmethod
+    def from_param(cls, c_class_object):
+        if c_class_object is not None and not isinstance(c_class_object, BaseCClass):
+            raise ValueError("c_class_object must be a BaseCClass instance!")
+
+        if c_class_object is None:
+            return ctypes.c_void_p()
+        else:
+            return ctypes.c_void_p(c_class_object._address())
+
+    def free(self):
+        pass
+
+
+def run():
+    directory = build_library()
+    if directory is None:
+        return {}
+    lib = load(BENCHLIB, path=directory)
+
+    results = {}
+    for cls in (OldParam, DefaultParam, CachedParam):
+        type_name = cls.TYPE_NAME
+        calls = {
+            1: Prototype(lib, "int bench_pointers1(%s)" % type_name),
+            2: Prototype(lib, "int bench_pointers2(%s, %s)" % ((type_name,) * 2)),
+            4: Prototype(lib, "int bench_pointers4(%s, %s, %s, %s)" % ((type_name,) * 4)),
+        }
+        a, b, c, d = [cls(address) for address in (16, 32, 48, 64)]
+        results["%s, 1 object argument" % cls.__name__] = measure(lambda: calls[1](a))
+        results["%s, 2 object arguments" % cls.__name__] = measure(lambda: calls[2](a, b))
+        results["%s, 4 object arguments" % cls.__name__] = measure(lambda: calls[4](a, b, c, d))
+    return results
+
+
+if __name__ == "__main__":
+    report(__doc__.splitlines()[0], run())
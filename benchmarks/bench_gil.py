@@ -0,0 +1,67 @@
+"""GIL policy: holding vs. releasing the GIL around C calls.
+
+Releasing and reacquiring the GIL costs more than a trivial C function like
+labs(), so holding it is faster for such calls; in particular when another
+thread is busy running Python code and grabs the GIL while it is released. For a call which blocks or
+runs for a long time, here usleep(), releasing the GIL lets other threads
+run at the same time while holding it serializes all threads.
+"""
+
+import threading
+import time
+
+from common import LibcPrototype, measure, report
+
+
+def parallel_time(function, num_threads, calls_per_thread):
+    def worker():
+        for _ in range(calls_per_thread):
+            function(1000)
+
+    threads = [threading.Thread(target=worker) for _ in range(num_threads)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start
+
+
+class BusyThread(threading.Thread):
+    def __init__(self):
+        super(BusyThread, self).__init__(daemon=True)
+        self.running = True
+
+    def run(self):
+        while self.running:
+            pass
+
+
+def run(num_threads=4, calls_per_thread=50):
+    results = {}
+    for gil in ("hold", "release"):
+        labs = LibcPrototype("long labs(long)", gil=gil)
+        results["labs(), gil=%s [ns/call]" % gil] = measure(lambda: labs(-3))
+
+    busy = BusyThread()
+    busy.start()
+    try:
+        for gil in ("hold", "release"):
+            labs = LibcPrototype("long labs(long)", gil=gil)
+            results["labs(), gil=%s, busy thread [ns/call]" % gil] = measure(
+                lambda: labs(-3), number=200, repeat=5
+            )
+    finally:
+        busy.running = False
+        busy.join()
+
+    for gil in ("hold", "release"):
+        usleep = LibcPrototype("int usleep(uint)", gil=gil)
+        elapsed = parallel_time(usleep, num_threads, calls_per_thread)
+        results["%d threads x %d usleep(1ms), gil=%s [ms]" % (
+            num_threads, calls_per_thread, gil)] = elapsed * 1e3
+    return results
+
+
+if __name__ == "__main__":
+    report(__doc__.splitlines()[0], run(), unit="")
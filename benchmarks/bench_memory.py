@@ -0,0 +1,83 @@
+"""Memory per wrapper object: __dict__ vs. __slots__ instances.
+
+BaseCClass keeps its state in slots. A subclass which declares
+__slots__ = () gets instances without a __dict__ at all, while a subclass
+without __slots__ still has a __dict__ for its own attributes. DictLayout
+reproduces the old BaseCClass, which kept the pointer, parent and reference
+flag in the instance __dict__.
+
+The objects passed to C once are measured as well: with CACHE_C_PARAM the
+c_void_p created by from_param() stays with the object.
+"""
+
+import tracemalloc
+
+from common import report
+
+from cwrap import BaseCClass
+
+COUNT = 100000
+
+
+class DictLayout(object):
+    def __init__(self, c_pointer, parent=None, is_reference=False):
+        self.__c_pointer = c_pointer
+        self.__parent = parent
+        self.__is_reference = is_reference
+
+
+class WithDict(BaseCClass):
+    TYPE_NAME = "bench_memory_with_dict"
+
+    def free(self):
+        pass
+
+
+class Compact(BaseCClass):
+    TYPE_NAME = "bench_memory_compact"
+    __slots__ = ()
+
+    def free(self):
+        pass
+
+
+class CompactCachedParam(Compact):
+    TYPE_NAME = "bench_memory_compact_cached_param"
+    __slots__ = ()
+    CACHE_C_PARAM = True
+
+
+def passed_to_c(cls):
+    def factory(address):
+        obj = cls(address)
+        cls.from_param(obj)
+        return obj
+
+    return factory
+
+
+def bytes_per_object(factory):
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        objects = [factory(address) for address in range(1, COUNT + 1)]
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    # Subtract the list holding the objects.
+    return (after - before) / float(len(objects)) - 8
+
+
+def run():
+    return {
+        "old layout, attributes in __dict__": bytes_per_object(DictLayout),
+        "BaseCClass subclass without __slots__": bytes_per_object(WithDict),
+        "BaseCClass subclass, __slots__ = ()": bytes_per_object(Compact),
+        "createCReference, __slots__ = ()": bytes_per_object(Compact.createCReference),
+        "__slots__ = (), after a call": bytes_per_object(passed_to_c(Compact)),
+        "__slots__ = (), after a call, CACHE_C_PARAM": bytes_per_object(passed_to_c(CompactCachedParam)),
+    }
+
+
+if __name__ == "__main__":
+    report(__doc__.splitlines()[0], run(), unit="bytes")
@@ -0,0 +1,189 @@
+"""Class definition time for a synthetic binding module.
+
+Generates a module with many BaseCClass subclasses declaring prototypes
+against libc, and times importing it in a fresh interpreter. The module is
+compiled up front, so the import time is the time of defining the classes.
+The libc module binds the same dozen functions over and over; a second
+module binds distinct functions of a generated C library, like real
+bindings do, and is left out when no C compiler is available.
+
+Run it as a script with --baseline REV to time the same import with the
+cwrap of a git revision as well, e.g. before the latest commit:
+
+   python benchmarks/bench_resolve.py --baseline HEAD~1
+"""
+
+import argparse
+import os
+import py_compile
+import shutil
+import subprocess
+import sys
+import tarfile
+import tempfile
+
+from common import build_library, report
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+
+SHAPES = [
+    "int abs(int)",
+    "long labs(long)",
+    "int atoi(char*)",
+    "size_t strlen(char*)",
+    "char* strchr(char*, int)",
+    "int strcmp(char*, char*)",
+    "void* malloc(size_t)",
+    "void free(void*)",
+    "size_t strlen({type_name})",
+    "int memcmp({type_name}, {type_name}, size_t)",
+    "{type_name}_ref strchr({type_name}, int)",
+    "void free({type_name})",
+]
+
+# Shapes of the prototypes of distinct C functions, see distinct_module().
+DISTINCT_SHAPES = [
+    "int {name}({type_name})",
+    "double {name}({type_name}, int)",
+    "void {name}({type_name}, double)",
+    "char* {name}({type_name})",
+    "{type_name}_ref {name}({type_name}, int)",
+    "void* {name}(int, int)",
+    "bool {name}({type_name}, char*)",
+    "size_t {name}({type_name})",
+    "void {name}({type_name})",
+    "long {name}({type_name}, long, long)",
+    "int {name}()",
+    "double {name}(double)",
+]
+
+DISTINCT_LIBRARY = "libcwrap_resolve"
+
+IMPORT = """
+import sys, time
+sys.path.insert(0, %(root)r)
+sys.path.insert(0, %(directory)r)
+import cwrap
+start = time.perf_counter()
+import %(module)s
+print(time.perf_counter() - start)
+"""
+
+
+def synthetic_module(num_classes):
+    lines = [
+        "from cwrap import BaseCClass, Prototype, load",
+        "lib = load(None)",
+    ]
+    for index in range(num_classes):
+        type_name = "synthetic_%d" % index
+        lines.append("class Synthetic%d(BaseCClass):" % index)
+        lines.append("    TYPE_NAME = %r" % type_name)
+        for number, shape in enumerate(SHAPES):
+            prototype = shape.format(type_name=type_name)
+            bind = "{type_name}" in shape.split("(")[1]
+            lines.append(
+                "    _p%d = Prototype(lib, %r, bind=%r)" % (number, prototype, bind)
+            )
+    return "\n".join(lines) + "\n"
+
+
+def distinct_module(num_classes, directory):
+    """Module binding a distinct C function in every prototype, and the
+    C source of the library with the functions."""
+    lines = [
+        "from cwrap import BaseCClass, Prototype, load",
+        "lib = load(%r, path=%r)" % (DISTINCT_LIBRARY, directory),
+    ]
+    functions = []
+    for index in range(num_classes):
+        type_name = "distinct_%d" % index
+        lines.append("class Distinct%d(BaseCClass):" % index)
+        lines.append("    TYPE_NAME = %r" % type_name)
+        for number, shape in enumerate(DISTINCT_SHAPES):
+            name = "%s_f%d" % (type_name, number)
+            functions.append("void %s(void) {}" % name)
+            prototype = shape.format(type_name=type_name, name=name)
+            bind = "{type_name}" in shape.split("(")[1]
+            lines.append(
+                "    _p%d = Prototype(lib, %r, bind=%r)" % (number, prototype, bind)
+            )
+    return "\n".join(lines) + "\n", "\n".join(functions) + "\n"
+
+
+def time_imports(directory, module, roots, repeat=9):
+    """Return the best import time of @module with the cwrap of each root.
+
+    The samples of the roots are interleaved, so drifting machine load
+    affects them alike.
+    """
+    samples = dict((root, []) for root in roots)
+    for _ in range(repeat):
+        for root in roots:
+            source = IMPORT % {"root": root, "directory": directory, "module": module}
+            output = subprocess.check_output([sys.executable, "-c", source])
+            samples[root].append(float(output))
+    return [min(samples[root]) for root in roots]
+
+
+def write_modules(num_classes):
+    """Write and compile the modules, returns their directory and
+    {name: number of prototypes}."""
+    directory = tempfile.mkdtemp()
+    modules = {"synthetic_bindings": synthetic_module(num_classes)}
+
+    source, functions = distinct_module(num_classes, directory)
+    c_source = os.path.join(directory, "distinct.c")
+    with open(c_source, "w") as f:
+        f.write(functions)
+    if build_library(directory, name=DISTINCT_LIBRARY, source=c_source) is not None:
+        modules["distinct_bindings"] = source
+
+    for name, source in modules.items():
+        filename = os.path.join(directory, name + ".py")
+        with open(filename, "w") as f:
+            f.write(source)
+        py_compile.compile(filename)
+    return directory, sorted(modules)
+
+
+def export_revision(revision):
+    """Extract the tree of a git revision, returns its directory."""
+    directory = tempfile.mkdtemp()
+    archive = os.path.join(directory, "tree.tar")
+    with open(archive, "wb") as f:
+        subprocess.check_call(["git", "-C", ROOT, "archive", revision], stdout=f)
+    with tarfile.open(archive) as tar:
+        tar.extractall(directory)
+    return directory
+
+
+def run(num_classes=250, baseline=None):
+    directory, modules = write_modules(num_classes)
+    names = {
+        "synthetic_bindings": "import, %d prototypes" % (num_classes * len(SHAPES)),
+        "distinct_bindings": "import, %d distinct functions" % (num_classes * len(DISTINCT_SHAPES)),
+    }
+    roots = [ROOT]
+    results = {}
+    try:
+        if baseline is not None:
+            roots.append(export_revision(baseline))
+        for module in modules:
+            times = time_imports(directory, module, roots)
+            results[names[module]] = times[0] * 1e3
+            if baseline is not None:
+                results["%s, %s" % (names[module], baseline)] = times[1] * 1e3
+        return results
+    finally:
+        for tree in roots[1:]:
+            shutil.rmtree(tree)
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--baseline", metavar="REV", help="also time the cwrap of a git revision")
+    parser.add_argument("--classes", type=int, default=250, help="number of generated classes")
+    args = parser.parse_args()
+    report(__doc__.splitlines()[0], run(num_classes=args.classes, baseline=args.baseline), unit="ms")
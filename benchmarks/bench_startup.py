@@ -0,0 +1,118 @@
+"""Startup time with and without the binding cache.
+
+Times a fresh interpreter importing the synthetic binding module of
+bench_resolve.py together with a module populating enums from benchlib.c
+with BaseCEnum.populateEnum(), once with CWRAP_BINDING_CACHE=0 and once with
+CWRAP_BINDING_CACHE=1 and a warm cache. The cache only holds the enum
+lists; the enum module is left out when no C compiler is available.
+
+Run it as a script with --baseline REV to time the cwrap of a git revision
+as well, e.g. the one which still cached the prototype strings:
+
+   python benchmarks/bench_startup.py --baseline HEAD~1
+"""
+
+import argparse
+import os
+import py_compile
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from bench_resolve import ROOT, export_revision, synthetic_module
+from common import BENCHLIB, build_library, report
+
+IMPORT = """
+import sys, time
+sys.path.insert(0, %(root)r)
+sys.path.insert(0, %(directory)r)
+import cwrap
+start = time.perf_counter()
+%(imports)s
+print(time.perf_counter() - start)
+"""
+
+
+def enum_module(num_enums, library_directory):
+    lines = [
+        "from cwrap import BaseCEnum, load",
+        "lib = load(%r, path=%r)" % (BENCHLIB, library_directory),
+    ]
+    for index in range(num_enums):
+        lines.append("class SyntheticEnum%d(BaseCEnum):" % index)
+        lines.append("    TYPE_NAME = 'synthetic_enum_%d'" % index)
+        lines.append("SyntheticEnum%d.populateEnum(lib, 'bench_enum_iget')" % index)
+    return "\n".join(lines) + "\n"
+
+
+def write_modules(num_classes, num_enums):
+    """Write and compile the modules, returns their directory and names."""
+    directory = tempfile.mkdtemp()
+    modules = {"synthetic_bindings": synthetic_module(num_classes)}
+
+    library_directory = build_library()
+    if library_directory is not None:
+        modules["synthetic_enums"] = enum_module(num_enums, library_directory)
+
+    for name, source in modules.items():
+        filename = os.path.join(directory, name + ".py")
+        with open(filename, "w") as f:
+            f.write(source)
+        py_compile.compile(filename)
+    return directory, sorted(modules)
+
+
+def time_startup(directory, modules, configurations, repeat=9):
+    """Return the best import time of each (root, environment) pair.
+
+    Every configuration is run once up front, which fills the cache of
+    those with the cache enabled, and the samples are interleaved.
+    """
+    imports = "\n".join("import %s" % name for name in modules)
+    samples = [[] for _ in configurations]
+    for iteration in range(repeat + 1):
+        for index, (root, env) in enumerate(configurations):
+            source = IMPORT % {"root": root, "directory": directory, "imports": imports}
+            environment = dict(os.environ, **env)
+            output = subprocess.check_output([sys.executable, "-c", source], env=environment)
+            if iteration > 0:
+                samples[index].append(float(output))
+    return [min(times) for times in samples]
+
+
+def run(num_classes=250, num_enums=250, baseline=None):
+    directory, modules = write_modules(num_classes, num_enums)
+    cache_directory = tempfile.mkdtemp()
+    roots = [(ROOT, "")]
+    try:
+        if baseline is not None:
+            roots.append((export_revision(baseline), ", %s" % baseline))
+
+        configurations = []
+        names = []
+        for root, suffix in roots:
+            for enabled in ("0", "1"):
+                env = {"CWRAP_BINDING_CACHE": enabled, "CWRAP_CACHE_DIR": cache_directory + suffix}
+                configurations.append((root, env))
+                names.append("cache %s%s" % ("on" if enabled == "1" else "off", suffix))
+
+        times = time_startup(directory, modules, configurations)
+        return dict((name, value * 1e3) for name, value in zip(names, times))
+    finally:
+        for root, suffix in roots[1:]:
+            shutil.rmtree(root)
+        shutil.rmtree(directory)
+        shutil.rmtree(cache_directory, ignore_errors=True)
+        for root, suffix in roots[1:]:
+            shutil.rmtree(cache_directory + suffix, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--baseline", metavar="REV", help="also time the cwrap of a git revision")
+    parser.add_argument("--classes", type=int, default=250, help="number of generated classes")
+    parser.add_argument("--enums", type=int, default=250, help="number of generated enums")
+    args = parser.parse_args()
+    results = run(num_classes=args.classes, num_enums=args.enums, baseline=args.baseline)
+    report(__doc__.splitlines()[0], results, unit="ms")
@@ -0,0 +1,78 @@
+/*
+  Small C library used by the cwrap benchmarks; it is compiled when the
+  benchmarks run, see build_library() in common.py.
+*/
+
+#include <stdlib.h>
+#include <string.h>
+
+typedef struct node_struct node_type;
+
+struct node_struct {
+  int value;
+  int num_children;
+  node_type * children;
+  char name[32];
+};
+
+int bench_noop(void) {
+  return 0;
+}
+
+int bench_add(int a, int b) {
+  return a + b;
+}
+
+node_type * node_alloc(int value, int num_children) {
+  node_type * node = calloc(1, sizeof * node);
+  node->value = value;
+  node->num_children = num_children;
+  node->children = calloc(num_children, sizeof * node->children);
+  for (int i = 0; i < num_children; i++)
+    node->children[i].value = i;
+  strcpy(node->name, "benchmark-node");
+  return node;
+}
+
+void node_free(node_type * node) {
+  free(node->children);
+  free(node);
+}
+
+int node_get_value(const node_type * node) {
+  return node->value;
+}
+
+const char * node_get_name(const node_type * node) {
+  return node->name;
+}
+
+int node_get_size(const node_type * node) {
+  return node->num_children;
+}
+
+node_type * node_iget_child(node_type * node, int index) {
+  return &node->children[index];
+}
+
+static const char * bench_enum_names[] = {"NONE", "READ", "WRITE", "EXECUTE", NULL};
+static const int bench_enum_values[] = {0, 1, 2, 4};
+
+const char * bench_enum_iget(int index, int * value) {
+  if (index < 0 || index > 3)
+    return NULL;
+  *value = bench_enum_values[index];
+  return bench_enum_names[index];
+}
+
+int bench_pointers1(void * p1) {
+  return p1 != NULL;
+}
+
+int bench_pointers2(void * p1, void * p2) {
+  return p1 != p2;
+}
+
+int bench_pointers4(void * p1, void * p2, void * p3, void * p4) {
+  return p1 != p4 && p2 != p3;
+}
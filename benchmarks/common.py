@@ -0,0 +1,76 @@
+"""Helpers shared by the cwrap micro benchmarks.
+
+The benchmarks are plain scripts, run them from the repository root:
+
+   python benchmarks/bench_bound_method.py
+
+or all of them, optionally compared with a stored baseline, through
+benchmarks/run.py.
+"""
+
+import os
+import subprocess
+import sys
+import sysconfig
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from cwrap import Prototype, lib_name, load
+
+
+class LibcPrototype(Prototype):
+    lib = load("msvcrt" if os.name == "nt" else None)
+
+    def __init__(self, prototype, bind=False, gil=None):
+        super(LibcPrototype, self).__init__(
+            LibcPrototype.lib, prototype, bind=bind, gil=gil
+        )
+
+
+def measure(func, number=100000, repeat=7):
+    """Return the best time per call of func(), in nanoseconds."""
+    timer = timeit.Timer(func)
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1e9
+
+
+def report(title, results, unit="ns/op"):
+    print(title)
+    width = max(len(name) for name in results)
+    for name, value in results.items():
+        print("  %-*s %12.1f %s" % (width, name, value, unit))
+
+
+BENCHLIB = "libcwrap_bench"
+BENCHLIB_SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchlib.c")
+
+ALLOCATIONS = "libcwrap_allocations"
+ALLOCATIONS_SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "allocations.c")
+
+
+def build_library(directory=None, name=BENCHLIB, source=BENCHLIB_SOURCE, python=False):
+    """Compile a C source to a shared library, returns its directory or None.
+
+    By default benchlib.c is built; load it with load(BENCHLIB,
+    path=directory). With python=True the source is compiled against the
+    headers of the running interpreter. The library is rebuilt only when the
+    source is newer; None is returned when there is no working C compiler.
+    """
+    if directory is None:
+        directory = os.path.join(tempfile.gettempdir(), "cwrap-benchmarks")
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+
+    target = lib_name(name, path=directory)
+    if os.path.isfile(target) and os.path.getmtime(target) >= os.path.getmtime(source):
+        return directory
+
+    command = [os.getenv("CC", "cc"), "-O2", "-shared", "-fPIC", "-std=c99"]
+    if python:
+        command.append("-I%s" % sysconfig.get_paths()["include"])
+    try:
+        subprocess.check_call(command + ["-o", target, source])
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return directory
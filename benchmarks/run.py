@@ -0,0 +1,100 @@
+"""Run the cwrap benchmarks and compare them against a stored baseline.
+
+   python benchmarks/run.py                          # run and report
+   python benchmarks/run.py --save baseline.json     # store a baseline
+   python benchmarks/run.py --compare baseline.json  # fail on regressions
+
+All benchmarks report times, lower is better. With --compare every result
+is compared to the baseline, and the exit status is 1 if any of them is
+slower by more than --threshold (default 0.25, i.e. 25%); timings are noisy
+so compare baselines from the same machine. The benchmark modules are the
+bench_*.py files in this directory, select some of them with --only.
+"""
+
+import argparse
+import glob
+import importlib
+import json
+import os
+import platform
+import sys
+
+from common import report
+
+DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+
+def benchmark_modules():
+    names = sorted(glob.glob(os.path.join(DIRECTORY, "bench_*.py")))
+    return [os.path.splitext(os.path.basename(name))[0] for name in names]
+
+
+def run_benchmarks(modules):
+    results = {}
+    for name in modules:
+        module = importlib.import_module(name)
+        results[name] = module.run()
+        report(module.__doc__.splitlines()[0], results[name], unit="")
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Print the change relative to @baseline, returns the regressions."""
+    regressions = []
+    for module, values in sorted(results.items()):
+        previous = baseline.get(module, {})
+        print(module)
+        width = max(len(name) for name in values)
+        for name, value in values.items():
+            if name not in previous or not previous[name]:
+                print("  %-*s %12.1f %12s" % (width, name, value, "new"))
+                continue
+
+            change = value / previous[name] - 1.0
+            flag = ""
+            if change > threshold:
+                flag = "  REGRESSION"
+                regressions.append("%s: %s" % (module, name))
+            print(
+                "  %-*s %12.1f %12.1f %+7.1f%%%s"
+                % (width, name, previous[name], value, 100 * change, flag)
+            )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--save", metavar="FILE", help="store the results as a baseline")
+    parser.add_argument("--compare", metavar="FILE", help="compare with a stored baseline")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="relative slowdown counted as a regression")
+    parser.add_argument("--only", nargs="+", metavar="MODULE", choices=benchmark_modules(),
+                        help="run only these benchmark modules")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.only or benchmark_modules())
+
+    if args.save:
+        content = {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "results": results,
+        }
+        with open(args.save, "w") as f:
+            json.dump(content, f, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        print("\nCompared with %s (baseline, current, change):" % args.compare)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print("\n%d regression(s) above %d%%:" % (len(regressions), 100 * args.threshold))
+            for regression in regressions:
+                print("  " + regression)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -41,13 +41,25 @@ __status__ = 'Prototype'
 
 from .basecclass import BaseCClass
 from .basecenum import BaseCEnum
-from .basecvalue import BaseCValue
+from .basecvalue import BaseCValue, BaseCValueArray
 
 from .cfile import CFILE, copen as open
+from .deferredfree import configure_deferred_free, flush_frees
+from .census import census, census_report, enable_census, disable_census
+from .memory import (enable_memory_tracking, disable_memory_tracking,
+                     tracked_memory, set_memory_budget)
 from .clib import load, lib_name
 
 from .metacwrap import MetaCWrap
 from .prototype import REGISTERED_TYPES, Prototype, PrototypeError
+from .instrument import stats, enable_stats, disable_stats, reset_stats, dump_stats
+from .instrument import enable_tracing, disable_tracing, clear_trace, dump_trace
 
-__all__ = ['BaseCClass', 'BaseCEnum', 'BaseCValue', 'CFILE', 'open',
-           'MetaCWrap', 'Prototype', 'load', 'lib_name']
+__all__ = ['BaseCClass', 'BaseCEnum', 'BaseCValue', 'BaseCValueArray', 'CFILE', 'open',
+           'MetaCWrap', 'Prototype', 'load', 'lib_name',
+           'stats', 'enable_stats', 'disable_stats', 'reset_stats', 'dump_stats',
+           'enable_tracing', 'disable_tracing', 'clear_trace', 'dump_trace',
+           'configure_deferred_free', 'flush_frees',
+           'census', 'census_report', 'enable_census', 'disable_census',
+           'enable_memory_tracking', 'disable_memory_tracking', 'tracked_memory',
+           'set_memory_budget']
@@ -20,12 +20,62 @@ from __future__ import (absolute_import, division,
 import six
 
 import ctypes
+from .deferredfree import defer_free
 from .metacwrap import MetaCWrap
 
+# Passed for None arguments; ctypes only reads it.
+_NULL = ctypes.c_void_p()
+
 @six.add_metaclass(MetaCWrap)
 class BaseCClass(object):
+    # The instance state is kept in slots. Subclasses which declare
+    # __slots__ = () themselves get compact instances without a __dict__;
+    # subclasses without __slots__ work as before. The names are mangled
+    # by hand, six.add_metaclass() looks the slots up unmangled.
+    __slots__ = (
+        "_BaseCClass__c_pointer",
+        "_BaseCClass__parent",
+        "_BaseCClass__is_reference",
+        "__weakref__",
+    )
+
     namespaces = {}
 
+    # When True, bound prototypes of the class are installed as plain
+    # methods instead of being bound through Prototype.__get__ on each access.
+    PROTOTYPE_METHODS = False
+
+    # When set, overrides Prototype.lazy for the prototypes of the class.
+    LAZY_PROTOTYPES = None
+
+    # When True, createCReference() and createPythonObject() return the live
+    # wrapper of a pointer instead of a new one, see _cachedWrapper().
+    CACHE_REFERENCES = False
+    _wrapper_cache = None
+
+    # When True, from_param() keeps the c_void_p it creates for an object
+    # and reuses it in later calls. That saves an allocation per argument,
+    # but costs about 144 bytes per object which has been passed to C, see
+    # benchmarks/bench_memory.py and bench_from_param.py. Set it in the
+    # class body; MetaCWrap adds the slot for the c_void_p to the __slots__
+    # of the class.
+    CACHE_C_PARAM = False
+
+    # Names of the prototypes freeing the C objects of collected instances
+    # in batches, see cwrap.deferredfree. DEFERRED_FREE is a bound prototype
+    # like "void node_free(node)", BULK_FREE an unbound prototype taking an
+    # array of pointers and a count. When either is set __del__ queues the
+    # pointer instead of calling free().
+    DEFERRED_FREE = None
+    BULK_FREE = None
+
+    # Name of a bound prototype returning the size in bytes of the C object,
+    # used by cwrap.census and cwrap.memory. They track the instances in
+    # _census and _memory when enabled.
+    MEMORY_USAGE = None
+    _census = None
+    _memory = None
+
     def __init__(self, c_pointer, parent=None, is_reference=False):
         if not c_pointer:
             raise ValueError("Must have a valid (not null) pointer value!")
@@ -34,9 +84,18 @@ class BaseCClass(object):
             raise ValueError("The pointer value is negative! This may be correct, but usually is not!")
 
         self.__c_pointer = c_pointer
+        if self.CACHE_C_PARAM:
+            self.__c_param = None
         self.__parent = parent
         self.__is_reference = is_reference
 
+        if self._wrapper_cache is not None:
+            self._wrapper_cache[c_pointer] = self
+        if self._census is not None:
+            self._census.add(self)
+        if self._memory is not None and self.MEMORY_USAGE and not is_reference:
+            self._memory.add(self)
+
     def __new__(cls, *more, **kwargs):
         obj = super(BaseCClass, cls).__new__(cls)
         obj.__c_pointer = None
@@ -54,19 +113,88 @@ class BaseCClass(object):
     def _ad_str(self):
         return 'at 0x%x' % self._address()
 
+    def _createView(self, c_pointer, size, data_type=None):
+        """Zero copy memoryview of @size elements of C memory owned by self.
+
+        The @c_pointer can be a ctypes pointer, e.g. the return value of a
+        'double*' prototype, or an integer address together with the ctypes
+        @data_type of the elements. The view keeps self alive as its parent,
+        so the memory is not freed while the view, or a NumPy array created
+        from it with numpy.asarray(), is in use.
+        """
+        if isinstance(c_pointer, ctypes._Pointer):
+            if data_type is None:
+                data_type = c_pointer._type_
+            c_pointer = ctypes.cast(c_pointer, ctypes.c_void_p).value
+
+        if data_type is None:
+            raise ValueError("The data_type must be given for an address")
+
+        if size == 0:
+            return memoryview(b"").cast(data_type._type_)
+
+        if not c_pointer:
+            raise ValueError("Can not create a view of a NULL pointer")
+
+        array = (data_type * size).from_address(c_pointer)
+        array._parent = self
+        # ctypes exports e.g. '<d'; recast to the native format character,
+        # which memoryview supports for indexing and tolist().
+        return memoryview(array).cast("B").cast(data_type._type_)
+
     @classmethod
     def from_param(cls, c_class_object):
-        if c_class_object is not None and not isinstance(c_class_object, BaseCClass):
-            raise ValueError("c_class_object must be a BaseCClass instance!")
-
+        # Called for every argument of every call; with CACHE_C_PARAM the
+        # c_void_p is created once per object and reset when the pointer
+        # changes.
         if c_class_object is None:
-            return ctypes.c_void_p()
-        else:
-            return ctypes.c_void_p(c_class_object.__c_pointer)
+            return _NULL
+
+        try:
+            c_pointer = c_class_object.__c_pointer
+        except AttributeError:
+            six.raise_from(ValueError("c_class_object must be a BaseCClass instance!"), None)
+
+        if not c_class_object.CACHE_C_PARAM:
+            return ctypes.c_void_p(c_pointer)
+
+        param = getattr(c_class_object, "_BaseCClass__c_param", None)
+        if param is None:
+            param = c_class_object.__c_param = ctypes.c_void_p(c_pointer)
+        return param
+
+    @classmethod
+    def _cachedWrapper(cls, c_pointer):
+        """The live wrapper of @c_pointer when CACHE_REFERENCES is set, or None.
+
+        The cache holds weak references, keyed by pointer, to all the
+        instances of the class; an entry is removed when the wrapper is
+        garbage collected, freed or invalidated, and replaced when
+        createCReference() is called with a different parent.
+        """
+        cache = cls._wrapper_cache
+        if cache is None:
+            return None
+        return cache.get(c_pointer)
+
+    def _release(self):
+        # The C object is freed, or no longer owned by self.
+        cache = self._wrapper_cache
+        if cache is not None and self.__c_pointer is not None:
+            if cache.get(self.__c_pointer) is self:
+                del cache[self.__c_pointer]
+        if self._memory is not None:
+            self._memory.remove(self)
 
     @classmethod
     def createPythonObject(cls, c_pointer):
         if c_pointer is not None:
+            # A reference wrapper for the same pointer can not take over the
+            # ownership; it is replaced by the new owning object.
+            cached = cls._cachedWrapper(c_pointer)
+            if cached is not None and not cached.isReference():
+                return cached
+
             new_obj = cls.__new__(cls)
             BaseCClass.__init__(new_obj, c_pointer=c_pointer, parent=None, is_reference=False)
             return new_obj
@@ -76,6 +204,15 @@ class BaseCClass(object):
     @classmethod
     def createCReference(cls, c_pointer, parent=None):
         if c_pointer is not None:
+            # A cached reference is returned only when it keeps the same
+            # parent alive. With another parent the address has been reused
+            # for a new C object, or is owned twice; either way it gets a new
+            # wrapper, which replaces the cached one.
+            cached = cls._cachedWrapper(c_pointer)
+            if cached is not None:
+                if not cached.isReference() or parent is None or cached.parent() is parent:
+                    return cached
+
             new_obj = cls.__new__(cls)
             BaseCClass.__init__(new_obj, c_pointer=c_pointer, parent=parent, is_reference=True)
             return new_obj
@@ -89,6 +226,8 @@ class BaseCClass(object):
     def convertToCReference(self, parent):
         self.__is_reference = True
         self.__parent = parent
+        if self._memory is not None:
+            self._memory.remove(self)
 
 
     def setParent(self, parent=None):
@@ -137,10 +276,16 @@ class BaseCClass(object):
                 # Important to check the c_pointer; in the case of failed object creation
                 # we can have a Python object with c_pointer == None.
                 if self.__c_pointer:
-                    self.free()
+                    if self.DEFERRED_FREE or self.BULK_FREE:
+                        defer_free(type(self), self.__c_pointer)
+                    else:
+                        self.free()
 
     def _invalidateCPointer(self):
+        self._release()
         self.__c_pointer = None
+        if self.CACHE_C_PARAM:
+            self.__c_param = None
 
 
     def __bool__(self):
@@ -26,9 +26,19 @@ from .metacwrap import MetaCWrap
 @six.add_metaclass(MetaCWrap)
 class BaseCEnum(object):
     enum_namespace = {}
+    # Per class indexes maintained by addEnum(); for duplicate values or
+    # names the first registered enum wins, as in enum_namespace order.
+    enum_values = {}
+    enum_names = {}
+    # Unnamed enums created by the flag arithmetic, per class and value; at
+    # most COMPOSITE_CACHE_SIZE of them are kept.
+    enum_composites = {}
+    COMPOSITE_CACHE_SIZE = 1024
+    # Lookup arrays for the NumPy helpers, created on first use.
+    enum_arrays = {}
 
     def __init__(self, *args, **kwargs):
-        if not self in self.enum_namespace[self.__class__]:
+        if not self.value in self.enum_values[self.__class__]:
             raise NotImplementedError("Can not be instantiated directly!")
 
     def __new__(cls, *args, **kwargs):
@@ -53,33 +63,141 @@ class BaseCEnum(object):
 
     @classmethod
     def from_string(cls, name):
-        for enum in cls.enum_namespace[cls]:
-            if enum.name == name:
-                return enum
-
-        raise ValueError("No such enum:%s" % name)
+        enum = cls.enum_names[cls].get(name)
+        if enum is None:
+            raise ValueError("No such enum:%s" % name)
+        return enum
 
     @classmethod
     def addEnum(cls, name, value):
-        name = str(name)
-        if not isinstance(value, int):
-            raise ValueError("Value must be an integer!")
-
-        enum = cls.__new__(cls)
-        enum.name = name
-        enum.value = value
-
-        setattr(cls, name, enum)
+        cls.addEnums([(name, value)])
 
+    @classmethod
+    def addEnums(cls, entries):
+        """Add a sequence of (name, value) pairs in one go."""
         if cls not in cls.enum_namespace:
             cls.enum_namespace[cls] = []
-
-        cls.enum_namespace[cls].append(enum)
+            cls.enum_values[cls] = {}
+            cls.enum_names[cls] = {}
+
+        namespace = cls.enum_namespace[cls]
+        by_value = cls.enum_values[cls]
+        by_name = cls.enum_names[cls]
+        composites = cls.enum_composites.get(cls, {})
+        for name, value in entries:
+            name = str(name)
+            if not isinstance(value, int):
+                raise ValueError("Value must be an integer!")
+
+            enum = cls.__new__(cls)
+            enum.name = name
+            enum.value = value
+
+            setattr(cls, name, enum)
+
+            namespace.append(enum)
+            by_value.setdefault(value, enum)
+            by_name.setdefault(name, enum)
+            composites.pop(value, None)
+        cls.enum_arrays.pop(cls, None)
 
     @classmethod
     def enums(cls):
         return list(cls.enum_namespace[cls])
 
+    @classmethod
+    def fromArray(cls, values):
+        """Convert an array of enum values to an object array of enums.
+
+        Like cls(value) for every element, but done with NumPy; raises
+        ValueError for values which are not registered. Requires NumPy.
+        """
+        arrays = cls.__enumArrays()
+        return arrays["enums"][cls.__valueIndex(arrays, values)]
+
+    @classmethod
+    def namesFromArray(cls, values):
+        """Convert an array of enum values to an array of enum names."""
+        arrays = cls.__enumArrays()
+        return arrays["names"][cls.__valueIndex(arrays, values)]
+
+    @classmethod
+    def toArray(cls, items):
+        """Convert enums, names or ints to a contiguous int32 array.
+
+        The result can be passed directly to an 'int*' argument. Ints must
+        be enum values, raises ValueError otherwise.
+        """
+        import numpy
+
+        array = numpy.asarray(items)
+        if array.dtype.kind in "US":
+            arrays = cls.__enumArrays()
+            sorted_names = arrays["sorted_names"]
+            index = numpy.searchsorted(sorted_names, array)
+            index = numpy.minimum(index, max(len(sorted_names) - 1, 0))
+            unknown = sorted_names[index] != array
+            if unknown.any():
+                raise ValueError("No such enum:%s" % array[unknown].flat[0])
+            array = arrays["name_values"][index]
+        elif array.dtype.kind == "O":
+            items = array.ravel()
+            if not set(map(type, items)) <= {cls}:
+                raise ValueError("Can only convert enums of type %s" % cls.__name__)
+            array = numpy.fromiter(map(int, items), dtype=numpy.int64, count=len(items)).reshape(array.shape)
+        elif array.size:
+            # Like fromArray() only the enum values are accepted, the cast
+            # to int32 would silently wrap or truncate anything else.
+            if array.dtype.kind not in "iu":
+                raise ValueError("Can not convert %s values to %s" % (array.dtype, cls.__name__))
+            cls.__valueIndex(cls.__enumArrays(), array)
+
+        return numpy.ascontiguousarray(array, dtype=numpy.int32)
+
+    @classmethod
+    def hasFlag(cls, values, flag):
+        """Boolean array telling which of the enum @values include @flag."""
+        import numpy
+
+        flag = int(flag)
+        return (numpy.asarray(values) & flag) == flag
+
+    @classmethod
+    def __enumArrays(cls):
+        arrays = cls.enum_arrays.get(cls)
+        if arrays is None:
+            import numpy
+
+            by_value = cls.enum_values[cls]
+            values = sorted(by_value)
+            enums = numpy.empty(len(values), dtype=object)
+            enums[:] = [by_value[value] for value in values]
+
+            by_name = cls.enum_names[cls]
+            names = sorted(by_name)
+            arrays = {
+                "values": numpy.array(values, dtype=numpy.int64),
+                "enums": enums,
+                "names": numpy.array([enum.name for enum in enums]),
+                "sorted_names": numpy.array(names),
+                "name_values": numpy.array([by_name[name].value for name in names], dtype=numpy.int64),
+            }
+            cls.enum_arrays[cls] = arrays
+        return arrays
+
+    @classmethod
+    def __valueIndex(cls, arrays, values):
+        import numpy
+
+        values = numpy.asarray(values)
+        keys = arrays["values"]
+        index = numpy.searchsorted(keys, values)
+        index = numpy.minimum(index, max(len(keys) - 1, 0))
+        unknown = keys[index] != values
+        if unknown.any():
+            raise ValueError("Unknown enum value: %i" % values[unknown].flat[0])
+        return index
+
     def __eq__(self, other):
         if isinstance(other, self.__class__):
             return self.value == other.value
@@ -131,7 +249,8 @@ class BaseCEnum(object):
         return self.value
 
     def __contains__(self, item):
-        return self & item == item
+        self.__assertOtherIsSameType(item)
+        return self.value & item.value == item.value
 
     @classmethod
     def __createEnum(cls, value):
@@ -147,14 +266,17 @@ class BaseCEnum(object):
         if enum is not None:
             return enum
 
-        return cls.__createEnum(value)
+        composites = cls.enum_composites.setdefault(cls, {})
+        enum = composites.get(value)
+        if enum is None:
+            enum = cls.__createEnum(value)
+            if len(composites) < cls.COMPOSITE_CACHE_SIZE:
+                composites[value] = enum
+        return enum
 
     @classmethod
     def __resolveEnum(cls, value):
-        for enum in cls.enum_namespace[cls]:
-            if enum.value == value:
-                return enum
-        return None
+        return cls.enum_values[cls].get(value)
 
     def __assertOtherIsSameType(self, other):
         assert isinstance(
@@ -166,6 +288,26 @@ class BaseCEnum(object):
 
     @classmethod
     def populateEnum(cls, library, enum_provider_function):
+        """Add the enums listed by a C function.
+
+        The function is called as `name = func(index, &value)` for index =
+        0, 1, ... until it returns NULL. With the binding cache enabled for
+        the library, see clib.load(), the list is stored in the cache and
+        later processes do not call the function at all.
+        """
+        from .bindingcache import binding_cache
+
+        cache = binding_cache(library)
+        entries = cache.get("enums", enum_provider_function) if cache is not None else None
+        if entries is None:
+            entries = cls.__enumerate(library, enum_provider_function)
+            if cache is not None:
+                cache.put("enums", enum_provider_function, entries)
+
+        cls.addEnums(entries)
+
+    @classmethod
+    def __enumerate(cls, library, enum_provider_function):
         try:
             func = getattr(library, enum_provider_function)
         except AttributeError:
@@ -177,13 +319,16 @@ class BaseCEnum(object):
         func.restype = ctypes.c_char_p
         func.argtypes = [ctypes.c_int, ctypes.POINTER(ctypes.c_int)]
 
+        entries = []
+        value = ctypes.c_int()
+        value_ref = ctypes.byref(value)
         index = 0
         while True:
-            value = ctypes.c_int()
-            name = func(index, ctypes.byref(value))
+            name = func(index, value_ref)
 
             if name:
-                cls.addEnum(name, value.value)
+                entries.append([name.decode(), value.value])
                 index += 1
             else:
                 break
+        return entries
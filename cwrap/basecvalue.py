@@ -20,7 +20,8 @@ from __future__ import (absolute_import, division,
 import six
 
 from ctypes import (pointer, c_long, c_int, c_bool, c_float, c_double, c_byte,
-                    c_short, c_char, c_ubyte, c_ushort, c_uint, c_ulong)
+                    c_short, c_char, c_ubyte, c_ushort, c_uint, c_ulong, cast,
+                    POINTER, _Pointer)
 
 from .metacwrap import MetaCWrap
 
@@ -61,7 +62,101 @@ class BaseCValue(object):
 
     @classmethod
     def from_param(cls, c_value_object):
-        if c_value_object is not None and not isinstance(c_value_object, BaseCValue):
-            raise ValueError("c_class_object must be a BaseCValue instance!")
+        # The type check is only needed when the attribute lookup fails.
+        try:
+            return c_value_object.__value
+        except AttributeError:
+            if c_value_object is not None and not isinstance(c_value_object, BaseCValue):
+                six.raise_from(ValueError("c_class_object must be a BaseCValue instance!"), None)
+            raise
 
-        return c_value_object.__value
+
+@six.add_metaclass(MetaCWrap)
+class BaseCValueArray(object):
+    """Contiguous array of DATA_TYPE values, e.g. for C functions filling
+    many outputs in one call:
+
+       class DoubleArray(BaseCValueArray):
+           TYPE_NAME = "double_array"
+           DATA_TYPE = c_double
+
+       _get_depths = Prototype(lib, "void grid_get_depths(grid, double_array)", bind=True)
+
+       depths = DoubleArray(grid.get_global_size())
+       grid._get_depths(depths)
+       numpy_depths = depths.asNumpy()
+
+    An array can also be passed to arguments of the matching pointer type,
+    like 'double*'. The values are kept in one ctypes array.
+    """
+    DATA_TYPE = None
+    LEGAL_TYPES = BaseCValue.LEGAL_TYPES
+    # Only an argument type: a returned pointer does not tell the size of
+    # the array.
+    IS_RETURN_TYPE = False
+
+    def __init__(self, size_or_values):
+        super(BaseCValueArray, self).__init__()
+
+        if not self.DATA_TYPE in self.LEGAL_TYPES:
+            raise ValueError("DATA_TYPE must be one of these CTypes classes: %s" % BaseCValue.LEGAL_TYPES)
+
+        if isinstance(size_or_values, _Pointer):
+            raise ValueError("Can not create an array from a pointer, the size is unknown")
+
+        if isinstance(size_or_values, six.integer_types):
+            self.__array = (self.DATA_TYPE * size_or_values)()
+        else:
+            values = list(size_or_values)
+            self.__array = (self.DATA_TYPE * len(values))(*values)
+
+    def __len__(self):
+        return len(self.__array)
+
+    def __getitem__(self, index):
+        return self.__array[index]
+
+    def __setitem__(self, index, value):
+        self.__array[index] = value
+
+    def values(self):
+        return list(self.__array)
+
+    @property
+    def _as_parameter_(self):
+        # Makes the array acceptable for pointer arguments, e.g. 'double*'.
+        return self.__array
+
+    @classmethod
+    def storageType(cls):
+        if cls.DATA_TYPE in cls.LEGAL_TYPES:
+            return POINTER(cls.DATA_TYPE)
+        return None
+
+    @classmethod
+    def type(cls):
+        return cls.DATA_TYPE
+
+    def asPointer(self):
+        return cast(self.__array, POINTER(self.DATA_TYPE))
+
+    def asMemoryview(self):
+        """Zero copy memoryview of the values; it keeps the array alive."""
+        # ctypes exports e.g. '<d'; recast to the native format character,
+        # which memoryview supports for indexing and tolist().
+        return memoryview(self.__array).cast("B").cast(self.DATA_TYPE._type_)
+
+    def asNumpy(self):
+        """Zero copy NumPy array of the values. Requires NumPy."""
+        import numpy
+
+        return numpy.asarray(self.asMemoryview())
+
+    @classmethod
+    def from_param(cls, c_array_object):
+        try:
+            return c_array_object.__array
+        except AttributeError:
+            if c_array_object is not None and not isinstance(c_array_object, BaseCValueArray):
+                six.raise_from(ValueError("c_array_object must be a BaseCValueArray instance!"), None)
+            raise
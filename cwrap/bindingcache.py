@@ -0,0 +1,214 @@
+#  Copyright (C) 2016 Statoil ASA, Norway.
+#
+#  This file is part of cwrap.
+#
+#  cwrap is free software: you can redistribute it and/or modify it under the
+#  terms of the GNU General Public License as published by the Free Software
+#  Foundation, either version 3 of the License, or (at your option) any later
+#  version.
+#
+#  cwrap is distributed in the hope that it will be useful, but WITHOUT ANY
+#  WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+#  A PARTICULAR PURPOSE.
+#
+#  See the GNU General Public License at <http://www.gnu.org/licenses/gpl.html>
+#  for more details.
+
+"""Persistent cache of resolved bindings for a shared library.
+
+The cache stores the enum lists read with BaseCEnum.populateEnum(): the
+(name, value) pairs returned by the enum provider functions of a library.
+A later interpreter start loading the same library file adds the enums
+from the cache without calling into the library. Prototypes are not
+cached; parsing a prototype string is cheap compared to the symbol lookup
+and the ctypes setup, which need the loaded library in every process.
+
+A cache file is keyed by the real path of the library together with its
+mtime, inode and size, and by the cwrap version; a rebuilt library or an
+upgraded cwrap simply gets a new cache file. The cache is enabled per
+library with clib.load(..., binding_cache=True), or for all libraries
+loaded through clib.load() by setting the environment variable
+CWRAP_BINDING_CACHE=1. The files are written to CWRAP_CACHE_DIR, default
+~/.cache/cwrap, when the interpreter exits.
+"""
+
+import atexit
+import ctypes
+import os
+import sys
+import weakref
+
+try: from .version import version as cwrap_version
+except ImportError: cwrap_version = '0.0.0'
+
+
+_CACHES = weakref.WeakKeyDictionary()
+_OPEN_CACHES = []
+
+
+def cache_directory():
+    directory = os.getenv("CWRAP_CACHE_DIR")
+    if directory:
+        return directory
+    return os.path.join(os.path.expanduser("~"), ".cache", "cwrap")
+
+
+class _LinkMap(ctypes.Structure):
+    # The leading fields of struct link_map, see <link.h>.
+    _fields_ = [("l_addr", ctypes.c_void_p), ("l_name", ctypes.c_char_p)]
+
+
+_RTLD_DI_LINKMAP = 2
+
+
+def _linkerPath(lib):
+    """Return the path the runtime linker opened @lib from, or None.
+
+    Uses dlinfo(), which is not available on all platforms.
+    """
+    try:
+        dlinfo = ctypes.CDLL(None).dlinfo
+    except (AttributeError, OSError, TypeError):
+        return None
+
+    link_map = ctypes.POINTER(_LinkMap)()
+    if dlinfo(ctypes.c_void_p(lib._handle), _RTLD_DI_LINKMAP, ctypes.byref(link_map)) != 0:
+        return None
+    name = link_map.contents.l_name
+    if not name:
+        return None
+    return os.path.realpath(name.decode(sys.getfilesystemencoding()))
+
+
+def library_path(lib):
+    """Return the path of the file a loaded library was read from, or None."""
+    name = getattr(lib, "_name", None)
+    if name is None:
+        # dlopen(NULL), i.e. the running process.
+        return os.path.realpath(sys.executable)
+
+    if os.path.isfile(name):
+        return os.path.realpath(name)
+
+    # The library was found by the runtime linker, e.g. load("libz") opens
+    # libz.so, which may be a link to libz.so.1.2.13.
+    path = _linkerPath(lib)
+    if path is not None:
+        return path
+
+    # Otherwise look up which file was mapped; the name can be a prefix of
+    # the versioned file name.
+    base = os.path.basename(name)
+    try:
+        with open("/proc/self/maps") as maps:
+            for line in maps:
+                fields = line.split(None, 5)
+                if len(fields) == 6:
+                    path = fields[5].strip()
+                    mapped = os.path.basename(path)
+                    if mapped == base or mapped.startswith(base + "."):
+                        return os.path.realpath(path)
+    except (IOError, OSError):
+        pass
+
+    return None
+
+
+class BindingCache(object):
+    def __init__(self, filename):
+        self._filename = filename
+        self._sections = {}
+        self._dirty = False
+
+        # json, hashlib and tempfile are imported when a cache is used;
+        # populateEnum() imports this module for every enum.
+        import json
+
+        try:
+            with open(filename) as f:
+                content = json.load(f)
+            if content.get("version") == cwrap_version:
+                self._sections = content["sections"]
+        except (IOError, OSError, ValueError, KeyError):
+            pass
+
+    @classmethod
+    def forLibrary(cls, lib, directory=None):
+        """Create the cache for @lib, returns None if the file is unknown."""
+        path = library_path(lib)
+        if path is None:
+            return None
+
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+
+        identity = "%s:%d:%d:%d:%s" % (
+            path, stat.st_mtime_ns, stat.st_ino, stat.st_size, cwrap_version
+        )
+        import hashlib
+
+        digest = hashlib.sha1(identity.encode()).hexdigest()
+        if directory is None:
+            directory = cache_directory()
+        return cls(os.path.join(directory, "%s.json" % digest))
+
+    def filename(self):
+        return self._filename
+
+    def get(self, section, key):
+        return self._sections.get(section, {}).get(key)
+
+    def put(self, section, key, value):
+        entries = self._sections.setdefault(section, {})
+        if entries.get(key) != value:
+            entries[key] = value
+            self._dirty = True
+
+    def save(self):
+        if not self._dirty:
+            return
+
+        import json
+        import tempfile
+
+        content = {"version": cwrap_version, "sections": self._sections}
+        directory = os.path.dirname(self._filename)
+        try:
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+            # Write and rename, concurrent processes may save the same file.
+            fd, tmp_name = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump(content, f)
+            os.replace(tmp_name, self._filename)
+            self._dirty = False
+        except (IOError, OSError):
+            pass
+
+
+def enable_binding_cache(lib, directory=None):
+    """Enable the persistent binding cache for a loaded library."""
+    if lib not in _CACHES:
+        cache = BindingCache.forLibrary(lib, directory=directory)
+        if cache is None:
+            return None
+        _CACHES[lib] = cache
+        _OPEN_CACHES.append(cache)
+    return _CACHES[lib]
+
+
+def binding_cache(lib):
+    """Return the binding cache of @lib, or None if it is not enabled."""
+    try:
+        return _CACHES.get(lib)
+    except TypeError:
+        # Not weak referenceable, can not have a cache.
+        return None
+
+
+@atexit.register
+def save_binding_caches():
+    for cache in _OPEN_CACHES:
+        cache.save()
@@ -0,0 +1,190 @@
+#  Copyright (C) 2016 Statoil ASA, Norway.
+#
+#  This file is part of cwrap.
+#
+#  cwrap is free software: you can redistribute it and/or modify it under the
+#  terms of the GNU General Public License as published by the Free Software
+#  Foundation, either version 3 of the License, or (at your option) any later
+#  version.
+#
+#  cwrap is distributed in the hope that it will be useful, but WITHOUT ANY
+#  WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+#  A PARTICULAR PURPOSE.
+#
+#  See the GNU General Public License at <http://www.gnu.org/licenses/gpl.html>
+#  for more details.
+
+"""Census of the live BaseCClass instances, to find leaking C objects.
+
+With enable_census() every BaseCClass instance created afterwards is
+tracked until it is garbage collected. census() returns the live instances
+per class, split into owned objects and references, together with the
+classes of the parents kept alive by the references. With
+record_sites=True the Python source line which created each instance is
+recorded as well, and census() reports the lines with most live objects.
+
+A class can declare a bound prototype returning the size in bytes of its C
+object,
+
+   class Grid(BaseCClass):
+       MEMORY_USAGE = "_memory_usage"
+       _memory_usage = GridPrototype("size_t grid_memory_usage(grid)", bind=True)
+
+and the census sums it over the live owned objects. With report=True, or
+the environment variable CWRAP_CENSUS=1, the census is printed when the
+interpreter exits.
+"""
+
+import atexit
+import collections
+import os
+import sys
+import weakref
+
+from .basecclass import BaseCClass
+
+_PACKAGE_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+
+class Census(object):
+    def __init__(self, record_sites=False):
+        self._record_sites = record_sites
+        self._live = {}
+
+    def add(self, obj):
+        key = id(obj)
+        site = _creationSite() if self._record_sites else None
+        self._live[key] = (weakref.ref(obj, lambda _, key=key: self._live.pop(key, None)), site)
+
+    def objects(self):
+        """Yield (obj, site) for the live tracked objects."""
+        for ref, site in list(self._live.values()):
+            obj = ref()
+            if obj is not None and obj.is_initialized():
+                yield obj, site
+
+
+def _creationSite():
+    # The innermost frame outside cwrap, i.e. the code which called the
+    # constructor or the prototype returning the object.
+    frame = sys._getframe(2)
+    while frame is not None:
+        code = frame.f_code
+        if not os.path.abspath(code.co_filename).startswith(_PACKAGE_DIRECTORY):
+            return "%s:%d in %s" % (code.co_filename, frame.f_lineno, code.co_name)
+        frame = frame.f_back
+    return None
+
+
+class ClassCensus(object):
+    def __init__(self, name):
+        self.name = name
+        self.owned = 0
+        self.references = 0
+        self.bytes = None
+        self.parents = collections.Counter()
+        self.sites = collections.Counter()
+
+    def asDict(self):
+        return {
+            "name": self.name,
+            "owned": self.owned,
+            "references": self.references,
+            "bytes": self.bytes,
+            "parents": dict(self.parents),
+            "sites": dict(self.sites),
+        }
+
+    def __repr__(self):
+        return "ClassCensus(%s, owned = %d, references = %d)" % (
+            self.name, self.owned, self.references
+        )
+
+
+_CENSUS = None
+_REPORT_REGISTERED = []
+
+
+def enable_census(record_sites=False, report=False):
+    """Track all BaseCClass instances created from now on."""
+    global _CENSUS
+    if _CENSUS is None or _CENSUS._record_sites != record_sites:
+        _CENSUS = Census(record_sites=record_sites)
+        BaseCClass._census = _CENSUS
+    if report and not _REPORT_REGISTERED:
+        atexit.register(_reportAtExit)
+        _REPORT_REGISTERED.append(True)
+
+
+def disable_census():
+    """Stop tracking new instances and forget the tracked ones."""
+    global _CENSUS
+    _CENSUS = None
+    BaseCClass._census = None
+
+
+def census():
+    """Return {class name: ClassCensus} for the live tracked instances."""
+    if _CENSUS is None:
+        return {}
+
+    result = {}
+    for obj, site in _CENSUS.objects():
+        cls = type(obj)
+        name = "%s.%s" % (cls.__module__, cls.__name__)
+        if name not in result:
+            result[name] = ClassCensus(name)
+        record = result[name]
+
+        if obj.isReference():
+            record.references += 1
+            parent = obj.parent()
+            if parent is not None:
+                record.parents[type(parent).__name__] += 1
+        else:
+            record.owned += 1
+            size = _memoryUsage(obj)
+            if size is not None:
+                record.bytes = (record.bytes or 0) + size
+
+        if site is not None:
+            record.sites[site] += 1
+    return result
+
+
+def _memoryUsage(obj):
+    if not obj.MEMORY_USAGE:
+        return None
+    try:
+        return int(getattr(obj, obj.MEMORY_USAGE)())
+    except Exception:
+        return None
+
+
+def census_report(stream=None, limit=20, sites=3):
+    """Print the classes with most live instances to @stream."""
+    if stream is None:
+        stream = sys.stderr
+
+    records = sorted(
+        census().values(), key=lambda record: record.owned + record.references, reverse=True
+    )
+    stream.write("cwrap census: %d classes with live instances\n" % len(records))
+    for record in records[:limit]:
+        line = "  %-50s owned: %8d  references: %8d" % (record.name, record.owned, record.references)
+        if record.bytes is not None:
+            line += "  bytes: %d" % record.bytes
+        stream.write(line + "\n")
+        for parent, count in record.parents.most_common(sites):
+            stream.write("      %8d references keep a %s alive\n" % (count, parent))
+        for site, count in record.sites.most_common(sites):
+            stream.write("      %8d created at %s\n" % (count, site))
+
+
+def _reportAtExit():
+    if _CENSUS is not None:
+        census_report()
+
+
+if os.getenv("CWRAP_CENSUS", "0") not in ("", "0"):
+    enable_census(record_sites=True, report=True)
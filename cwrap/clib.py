@@ -35,6 +35,7 @@ import platform
 import ctypes
 import os
 
+
 so_extension = {"linux"  : "so",
                 "linux2" : "so",
                 "linux3" : "so",
@@ -69,14 +70,30 @@ def lib_name(lib , path = None , so_version = None, so_ext = None):
 
 
 
-def load( lib, so_version = None, path = None, so_ext = None):
+def load( lib, so_version = None, path = None, so_ext = None, binding_cache = None, gil = "release"):
     """Thin wrapper around the ctypes.CDLL function for loading shared
     library.
 
     If the path argument is non Null the function will first try to
     load with full path. If that fails it wil also try to load without
     a path component, invoking normal dlopen() semantics.
+
+    With binding_cache=True the enums read from the library with
+    BaseCEnum.populateEnum() are stored on disk and reused by later
+    processes, see cwrap.bindingcache.
+    The default is taken from the environment variable CWRAP_BINDING_CACHE.
+
+    The gil argument is the default GIL policy for the functions of the
+    library: "release" loads it with ctypes.CDLL, which releases the GIL
+    during every call, "hold" loads it with ctypes.PyDLL, which keeps the
+    GIL and saves the release/acquire round trip for trivial functions.
+    Single prototypes can override it, see Prototype(..., gil=...).
     """
+    if gil not in ("hold", "release"):
+        raise ValueError("The gil policy must be 'hold' or 'release', not: %s" % gil)
+    dll_type = ctypes.PyDLL if gil == "hold" else ctypes.CDLL
+    if binding_cache is None:
+        binding_cache = os.getenv("CWRAP_BINDING_CACHE", "0") not in ("", "0")
 
     dll = None
     lib_files = [ lib_name( lib, path = None, so_version = so_version ),
@@ -87,7 +104,10 @@ def load( lib, so_version = None, path = None, so_ext = None):
 
     for lib_file in lib_files:
         try:
-            dll = ctypes.CDLL(lib_file , ctypes.RTLD_GLOBAL)
+            dll = dll_type(lib_file , ctypes.RTLD_GLOBAL)
+            if binding_cache:
+                from .bindingcache import enable_binding_cache
+                enable_binding_cache(dll)
             return dll
         except Exception as exc:
             error = exc
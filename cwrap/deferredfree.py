@@ -0,0 +1,184 @@
+#  Copyright (C) 2016 Statoil ASA, Norway.
+#
+#  This file is part of cwrap.
+#
+#  cwrap is free software: you can redistribute it and/or modify it under the
+#  terms of the GNU General Public License as published by the Free Software
+#  Foundation, either version 3 of the License, or (at your option) any later
+#  version.
+#
+#  cwrap is distributed in the hope that it will be useful, but WITHOUT ANY
+#  WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+#  A PARTICULAR PURPOSE.
+#
+#  See the GNU General Public License at <http://www.gnu.org/licenses/gpl.html>
+#  for more details.
+
+"""Deferred, batched freeing of the C objects of collected wrappers.
+
+By default BaseCClass.__del__ calls free() right away, so dropping a large
+container of wrappers runs all the C free calls in a row at that point. A
+class can instead name the prototype freeing its objects:
+
+   class Node(BaseCClass):
+       DEFERRED_FREE = "_free"
+       BULK_FREE = "_free_many"
+
+       _free = NodePrototype("void node_free(node)", bind=True)
+       _free_many = NodePrototype("void node_free_many(void*, int)")
+
+The pointers of collected instances are then queued, and the queue is
+drained when it holds `threshold` pointers, when flush_frees() is called
+and when the interpreter exits. With background=True the queue is drained
+by a separate thread instead, which only helps if the free functions
+release the GIL. With BULK_FREE all the queued pointers of a class are
+passed to one C call as an array of pointers and a count; otherwise the
+DEFERRED_FREE prototype is called for each pointer.
+
+Only the C function is called for a queued pointer, not the free() method of
+the class; objects freed explicitly with free() are not queued. A failing
+free is reported as a RuntimeWarning and its pointers are dropped, the
+other pointers are freed anyway.
+"""
+
+import atexit
+import collections
+import ctypes
+import threading
+import warnings
+
+from .prototype import Prototype, PrototypeError
+
+
+_QUEUE = collections.deque()
+_FREE_FUNCTIONS = {}
+
+
+class _Settings(object):
+    threshold = 1000
+    background = False
+    thread = None
+    wakeup = threading.Event()
+
+
+def configure_deferred_free(threshold=None, background=None):
+    """Set the queue length which triggers a drain, and where it runs."""
+    if threshold is not None:
+        if threshold < 1:
+            raise ValueError("The threshold must be >= 1, got %s" % threshold)
+        _Settings.threshold = int(threshold)
+
+    if background is not None:
+        _Settings.background = bool(background)
+        if _Settings.background and _Settings.thread is None:
+            _Settings.thread = threading.Thread(
+                target=_drainLoop, name="cwrap-deferred-free", daemon=True
+            )
+            _Settings.thread.start()
+
+
+def pending_frees():
+    return len(_QUEUE)
+
+
+def defer_free(cls, c_pointer):
+    """Queue @c_pointer, an object of @cls, to be freed later."""
+    _QUEUE.append((cls, c_pointer))
+    if len(_QUEUE) >= _Settings.threshold:
+        if _Settings.background:
+            _Settings.wakeup.set()
+        else:
+            flush_frees()
+
+
+def flush_frees():
+    """Free all the queued C objects now."""
+    batches = collections.OrderedDict()
+    while True:
+        try:
+            cls, c_pointer = _QUEUE.popleft()
+        except IndexError:
+            break
+        batches.setdefault(cls, []).append(c_pointer)
+
+    # Called from __del__ and at exit, where an exception would be lost
+    # together with the rest of the popped pointers.
+    for cls, pointers in batches.items():
+        try:
+            free = _freeFunction(cls)
+        except Exception as err:
+            _warnFailure(cls, pointers, err)
+            continue
+        free(pointers)
+
+
+def _warnFailure(cls, pointers, error):
+    warnings.warn(
+        "Could not free %d %s object(s): %s" % (len(pointers), cls.__name__, error),
+        RuntimeWarning,
+    )
+
+
+def _drainLoop():
+    while True:
+        _Settings.wakeup.wait()
+        _Settings.wakeup.clear()
+        try:
+            flush_frees()
+        except Exception as err:
+            # Keep the thread draining the queue.
+            warnings.warn("Deferred free failed: %s" % err, RuntimeWarning)
+
+
+def _classPrototype(cls, name):
+    for klass in cls.__mro__:
+        if name in vars(klass):
+            # A method installed by Prototype.installMethod() keeps the
+            # prototype as its _prototype attribute.
+            attr = vars(klass)[name]
+            if not isinstance(attr, Prototype):
+                attr = getattr(attr, "_prototype", None)
+            if isinstance(attr, Prototype):
+                return attr
+            break
+    raise AttributeError("%s has no prototype %s" % (cls.__name__, name))
+
+
+def _freeFunction(cls):
+    if cls not in _FREE_FUNCTIONS:
+        _FREE_FUNCTIONS[cls] = _createFreeFunction(cls)
+    return _FREE_FUNCTIONS[cls]
+
+
+def _createFreeFunction(cls):
+    if cls.BULK_FREE:
+        prototype = _classPrototype(cls, cls.BULK_FREE)
+
+        def freeMany(pointers):
+            try:
+                prototype((ctypes.c_void_p * len(pointers))(*pointers), len(pointers))
+            except Exception as err:
+                _warnFailure(cls, pointers, err)
+
+        return freeMany
+
+    prototype = _classPrototype(cls, cls.DEFERRED_FREE)
+    if not prototype._resolved:
+        prototype.resolve()
+    # The prototype takes instances of cls, call the C function directly.
+    raw = prototype._rawFunction()
+    if raw is None:
+        raise PrototypeError("Can not defer the free of %s objects with %s" % (cls.__name__, prototype))
+    raw.argtypes = [ctypes.c_void_p]
+
+    def freeEach(pointers):
+        for c_pointer in pointers:
+            try:
+                raw(c_pointer)
+            except Exception as err:
+                _warnFailure(cls, [c_pointer], err)
+
+    return freeEach
+
+
+atexit.register(flush_frees)
@@ -0,0 +1,329 @@
+#  Copyright (C) 2016 Statoil ASA, Norway.
+#
+#  This file is part of cwrap.
+#
+#  cwrap is free software: you can redistribute it and/or modify it under the
+#  terms of the GNU General Public License as published by the Free Software
+#  Foundation, either version 3 of the License, or (at your option) any later
+#  version.
+#
+#  cwrap is distributed in the hope that it will be useful, but WITHOUT ANY
+#  WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+#  A PARTICULAR PURPOSE.
+#
+#  See the GNU General Public License at <http://www.gnu.org/licenses/gpl.html>
+#  for more details.
+
+"""Opt-in instrumentation of the calls made through Prototype objects.
+
+With enable_stats() every resolved prototype records its number of calls,
+the cumulative and max wall time per call, and how that time splits
+between converting the arguments (from_param), the C call itself and the
+conversion of the return value (errcheck, _ref/_obj wrappers). The numbers
+are available from stats() and can be written as JSON or CSV with
+dump_stats():
+
+   cwrap.enable_stats()
+   run_job()
+   cwrap.dump_stats("cwrap_stats.csv")
+
+With enable_tracing() the prototype calls are recorded as events in a
+bounded ring buffer, tagged with the function name, thread and bound
+class. The events are written in the Chrome Trace Event format with
+dump_trace() and can be loaded in Perfetto or chrome://tracing. To keep
+the cost down in production only every n'th call can be recorded:
+
+   cwrap.enable_tracing(sample=100)
+   run_job()
+   cwrap.dump_trace("cwrap_trace.json")
+
+The instrumentation works by replacing the call target of the prototypes;
+when it is disabled the normal specialized call targets are used and there
+is no overhead at all.
+"""
+
+import collections
+import csv
+import itertools
+import json
+import os
+import threading
+import time
+
+from .prototype import Prototype, _uninitializedError
+
+
+class CallStats(object):
+    FIELDS = ("name", "count", "total", "max", "convert", "call", "result")
+
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.convert = 0.0
+        self.call = 0.0
+        self.result = 0.0
+
+    def add(self, convert, call, result):
+        elapsed = convert + call + result
+        self.count += 1
+        self.total += elapsed
+        self.convert += convert
+        self.call += call
+        self.result += result
+        if elapsed > self.max:
+            self.max = elapsed
+
+    def asDict(self):
+        return {field: getattr(self, field) for field in CallStats.FIELDS}
+
+    def __repr__(self):
+        return "CallStats(%s, count = %d, total = %g)" % (self.name, self.count, self.total)
+
+
+_STATS = {}
+
+
+def prototypeName(prototype):
+    """The name of a prototype in stats and traces, e.g. 'EclGrid._get_nx'."""
+    return getattr(prototype, "__qualname__", None) or prototype.__name__
+
+
+def _statsRecord(prototype):
+    name = prototypeName(prototype)
+    if name not in _STATS:
+        _STATS[name] = CallStats(name)
+    return _STATS[name]
+
+
+def _statsTarget(prototype, target):
+    """Call target measuring argument conversion, C call and return value."""
+    record = _statsRecord(prototype)
+    clock = time.perf_counter
+    func = prototype._func
+    raw = prototype._rawFunction()
+
+    if raw is None:
+        # Can not split the call up; account all of it as the C call.
+        def call(*args):
+            start = clock()
+            try:
+                return target(*args)
+            finally:
+                record.add(0.0, clock() - start, 0.0)
+
+        return call
+
+    converters = [argtype.from_param for argtype in func.argtypes or ()]
+    arity = len(converters)
+    bind = prototype._bind and arity > 0
+    convert = prototype._convert
+    errcheck = prototype._errcheck
+
+    def call(*args):
+        if len(args) != arity:
+            # Variadic or wrong number of arguments; let the target handle it.
+            start = clock()
+            try:
+                return target(*args)
+            finally:
+                record.add(0.0, clock() - start, 0.0)
+
+        if bind and not args[0].is_initialized():
+            raise _uninitializedError(args[0])
+
+        start = clock()
+        cargs = []
+        for index, converter in enumerate(converters):
+            try:
+                cargs.append(converter(args[index]))
+            except Exception as err:
+                raise prototype._conversionError(index, args) from err
+        converted = clock()
+
+        result = raw(*cargs)
+        called = clock()
+
+        if errcheck is not None:
+            result = errcheck(result, func, args)
+        elif convert is not None:
+            result = convert(result)
+        record.add(converted - start, called - converted, clock() - called)
+        return result
+
+    return call
+
+
+def enable_stats():
+    """Start recording call statistics for all prototypes."""
+    if _statsTarget not in Prototype._target_wrappers:
+        Prototype._target_wrappers.insert(0, _statsTarget)
+        Prototype._respecializeAll()
+
+
+def disable_stats():
+    """Stop recording call statistics, the recorded numbers are kept."""
+    if _statsTarget in Prototype._target_wrappers:
+        Prototype._target_wrappers.remove(_statsTarget)
+        Prototype._respecializeAll()
+
+
+def stats_enabled():
+    return _statsTarget in Prototype._target_wrappers
+
+
+def stats():
+    """Return {name: CallStats} for all prototypes which have been called."""
+    return {name: record for name, record in _STATS.items() if record.count}
+
+
+def reset_stats():
+    for record in _STATS.values():
+        record.__init__(record.name)
+
+
+def dump_stats(destination, format=None):
+    """Write the statistics to a filename or file object as JSON or CSV.
+
+    The format is taken from the file extension unless given; the records
+    are sorted by total time, the most expensive functions first.
+    """
+    if format is None:
+        name = destination if isinstance(destination, str) else getattr(destination, "name", "")
+        format = "csv" if str(name).endswith(".csv") else "json"
+    if format not in ("json", "csv"):
+        raise ValueError("Unknown format: %s" % format)
+
+    records = sorted(stats().values(), key=lambda record: record.total, reverse=True)
+
+    if isinstance(destination, str):
+        with open(destination, "w", newline="") as f:
+            _dumpStats(records, f, format)
+    else:
+        _dumpStats(records, destination, format)
+
+
+def _dumpStats(records, f, format):
+    if format == "json":
+        json.dump([record.asDict() for record in records], f, indent=2)
+    else:
+        writer = csv.DictWriter(f, fieldnames=CallStats.FIELDS)
+        writer.writeheader()
+        for record in records:
+            writer.writerow(record.asDict())
+
+
+class _Trace(object):
+    def __init__(self, sample, buffer_size):
+        self.sample = sample
+        self.events = collections.deque(maxlen=buffer_size)
+        self.counter = itertools.count()
+
+
+_TRACE = _Trace(1, 100000)
+
+
+def _traceTarget(prototype, target):
+    """Call target recording a sample of the calls in the trace buffer."""
+    name = prototypeName(prototype)
+    owner = name.rpartition(".")[0] or None
+    bound = prototype._bind
+    clock = time.perf_counter
+    get_ident = threading.get_ident
+    trace = _TRACE
+    sample = trace.sample
+    counter = trace.counter
+    append = trace.events.append
+
+    def call(*args):
+        if sample > 1 and next(counter) % sample:
+            return target(*args)
+
+        start = clock()
+        try:
+            return target(*args)
+        finally:
+            end = clock()
+            cls = type(args[0]).__name__ if bound and args else owner
+            append((name, cls, get_ident(), start, end - start))
+
+    return call
+
+
+def enable_tracing(sample=1, buffer_size=100000):
+    """Start tracing prototype calls, recording one in @sample calls.
+
+    The events go into a ring buffer holding the latest @buffer_size
+    calls; enabling the tracing again clears the buffer.
+    """
+    if sample < 1:
+        raise ValueError("The sample rate must be >= 1, got %s" % sample)
+    if buffer_size < 1:
+        raise ValueError("The buffer size must be >= 1, got %s" % buffer_size)
+
+    global _TRACE
+    _TRACE = _Trace(int(sample), int(buffer_size))
+    if _traceTarget in Prototype._target_wrappers:
+        Prototype._target_wrappers.remove(_traceTarget)
+    # Outermost, so that it includes the time spent on statistics.
+    Prototype._target_wrappers.append(_traceTarget)
+    Prototype._respecializeAll()
+
+
+def disable_tracing():
+    """Stop tracing, the recorded events are kept."""
+    if _traceTarget in Prototype._target_wrappers:
+        Prototype._target_wrappers.remove(_traceTarget)
+        Prototype._respecializeAll()
+
+
+def tracing_enabled():
+    return _traceTarget in Prototype._target_wrappers
+
+
+def clear_trace():
+    _TRACE.events.clear()
+
+
+def trace_events():
+    """Return the recorded events in the Chrome Trace Event format."""
+    pid = os.getpid()
+    thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+    events = []
+    threads = set()
+    for name, cls, tid, start, duration in list(_TRACE.events):
+        event = {
+            "name": name,
+            "cat": "cwrap",
+            "ph": "X",
+            "ts": start * 1e6,
+            "dur": duration * 1e6,
+            "pid": pid,
+            "tid": tid,
+        }
+        if cls is not None:
+            event["args"] = {"class": cls}
+        events.append(event)
+        threads.add(tid)
+
+    for tid in sorted(threads):
+        if tid in thread_names:
+            events.append({
+                "name": "thread_name",
+                "ph": "M",
+                "pid": pid,
+                "tid": tid,
+                "args": {"name": thread_names[tid]},
+            })
+    return events
+
+
+def dump_trace(destination):
+    """Write the trace as Chrome Trace Event JSON to a filename or file object."""
+    content = {"traceEvents": trace_events(), "displayTimeUnit": "ns"}
+    if isinstance(destination, str):
+        with open(destination, "w") as f:
+            json.dump(content, f)
+    else:
+        json.dump(content, destination)
@@ -0,0 +1,137 @@
+#  Copyright (C) 2016 Statoil ASA, Norway.
+#
+#  This file is part of cwrap.
+#
+#  cwrap is free software: you can redistribute it and/or modify it under the
+#  terms of the GNU General Public License as published by the Free Software
+#  Foundation, either version 3 of the License, or (at your option) any later
+#  version.
+#
+#  cwrap is distributed in the hope that it will be useful, but WITHOUT ANY
+#  WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+#  A PARTICULAR PURPOSE.
+#
+#  See the GNU General Public License at <http://www.gnu.org/licenses/gpl.html>
+#  for more details.
+
+"""Accounting of the C memory held by BaseCClass objects.
+
+Classes declaring a MEMORY_USAGE prototype, see cwrap.census, have the size
+of their C objects accounted while memory tracking is enabled:
+
+   cwrap.enable_memory_tracking()
+   grid = Grid(path)
+   cwrap.tracked_memory()   # {"ecl.grid.Grid": 123456}
+
+The size is taken when an owned object is created and released when it is
+freed, invalidated or garbage collected. When tracemalloc is tracing the
+allocations are also reported to tracemalloc in the TRACEMALLOC_DOMAIN
+domain, so they show up in tracemalloc snapshots; filter them with
+tracemalloc.DomainFilter(True, cwrap.memory.TRACEMALLOC_DOMAIN).
+
+With set_memory_budget(limit) creating an object which takes the tracked
+total above the limit raises MemoryError.
+"""
+
+import collections
+import ctypes
+import weakref
+
+from .basecclass import BaseCClass
+
+# 'cw'
+TRACEMALLOC_DOMAIN = 0x6377
+
+try:
+    _track = ctypes.pythonapi.PyTraceMalloc_Track
+    _track.argtypes = [ctypes.c_uint, ctypes.c_size_t, ctypes.c_size_t]
+    _track.restype = ctypes.c_int
+    _untrack = ctypes.pythonapi.PyTraceMalloc_Untrack
+    _untrack.argtypes = [ctypes.c_uint, ctypes.c_size_t]
+    _untrack.restype = ctypes.c_int
+except AttributeError:
+    _track = _untrack = None
+
+
+class MemoryTracker(object):
+    def __init__(self, domain=TRACEMALLOC_DOMAIN):
+        self.domain = domain
+        self.budget = None
+        self.total = 0
+        self._classes = collections.Counter()
+        self._objects = {}
+
+    def add(self, obj):
+        size = int(getattr(obj, obj.MEMORY_USAGE)())
+        if self.budget is not None and self.total + size > self.budget:
+            raise MemoryError(
+                "Creating %s of %d bytes exceeds the memory budget: %d of %d bytes in use"
+                % (type(obj).__name__, size, self.total, self.budget)
+            )
+
+        key = id(obj)
+        name = "%s.%s" % (type(obj).__module__, type(obj).__name__)
+        c_pointer = obj._address()
+        self._objects[key] = (
+            weakref.ref(obj, lambda _, key=key: self._remove(key)), name, c_pointer, size
+        )
+        self._classes[name] += size
+        self.total += size
+        if _track is not None:
+            _track(self.domain, c_pointer, size)
+
+    def remove(self, obj):
+        self._remove(id(obj))
+
+    def _remove(self, key):
+        entry = self._objects.pop(key, None)
+        if entry is None:
+            return
+
+        _, name, c_pointer, size = entry
+        self._classes[name] -= size
+        if not self._classes[name]:
+            del self._classes[name]
+        self.total -= size
+        if _untrack is not None:
+            _untrack(self.domain, c_pointer)
+
+    def classes(self):
+        return dict(self._classes)
+
+
+def enable_memory_tracking(domain=TRACEMALLOC_DOMAIN):
+    """Account the C memory of objects created from now on."""
+    if BaseCClass._memory is None:
+        BaseCClass._memory = MemoryTracker(domain=domain)
+
+
+def disable_memory_tracking():
+    """Stop the accounting and untrack all the objects."""
+    tracker = BaseCClass._memory
+    BaseCClass._memory = None
+    if tracker is not None:
+        for key in list(tracker._objects):
+            tracker._remove(key)
+
+
+def tracked_memory():
+    """Return {class name: bytes} of the live tracked objects."""
+    tracker = BaseCClass._memory
+    return tracker.classes() if tracker is not None else {}
+
+
+def total_tracked_memory():
+    tracker = BaseCClass._memory
+    return tracker.total if tracker is not None else 0
+
+
+def set_memory_budget(limit):
+    """Raise MemoryError when the tracked total would exceed @limit bytes.
+
+    None removes the budget. Memory tracking must be enabled.
+    """
+    tracker = BaseCClass._memory
+    if tracker is None:
+        raise ValueError("Memory tracking is not enabled, see enable_memory_tracking()")
+    tracker.budget = limit
@@ -14,7 +14,9 @@
 #  See the GNU General Public License at <http://www.gnu.org/licenses/gpl.html>
 #  for more details.
 
+import functools
 import re
+import weakref
 from types import MethodType
 
 from .prototype import Prototype
@@ -25,7 +27,50 @@ def snakeCase(name):
     return re.sub('([a-z0-9])([A-Z])', r'\1_\2', s1).lower()
 
 
+def releasingFree(free):
+    """Wrap free() to drop the object from the wrapper cache and memory
+    accounting, see BaseCClass._release()."""
+    @functools.wraps(free)
+    def wrapper(self, *args, **kwargs):
+        try:
+            return free(self, *args, **kwargs)
+        finally:
+            self._release()
+
+    wrapper._releases = True
+    return wrapper
+
+
+_C_PARAM_SLOT = "_BaseCClass__c_param"
+
+
+def _cachesCParam(bases, attrs):
+    if "CACHE_C_PARAM" in attrs:
+        return attrs["CACHE_C_PARAM"]
+    return any(getattr(base, "CACHE_C_PARAM", False) for base in bases)
+
+
+def _hasSlot(bases, slot):
+    for base in bases:
+        for klass in base.__mro__:
+            slots = vars(klass).get("__slots__", ())
+            if slot in ((slots,) if isinstance(slots, str) else slots):
+                return True
+    return False
+
+
 class MetaCWrap(type):
+    def __new__(mcs, name, bases, attrs):
+        # Only classes with CACHE_C_PARAM get the slot from_param() keeps
+        # the c_void_p in; the others would pay 8 bytes per instance for it.
+        # Classes without __slots__ keep it in the __dict__.
+        if "__slots__" in attrs and _cachesCParam(bases, attrs) and not _hasSlot(bases, _C_PARAM_SLOT):
+            slots = attrs["__slots__"]
+            if isinstance(slots, str):
+                slots = (slots,)
+            attrs = dict(attrs, __slots__=tuple(slots) + (_C_PARAM_SLOT,))
+        return super(MetaCWrap, mcs).__new__(mcs, name, bases, attrs)
+
     def __init__(cls, name, bases, attrs):
         super(MetaCWrap, cls).__init__(name, bases, attrs)
 
@@ -38,7 +83,7 @@ class MetaCWrap(type):
             type_name = snakeCase(name)
 
         if hasattr(cls, "DATA_TYPE") or hasattr(cls, "enums"):
-            is_return_type = True
+            is_return_type = getattr(cls, "IS_RETURN_TYPE", True)
 
         if hasattr(cls, "storageType"):
             storage_type = cls.storageType()
@@ -52,7 +97,22 @@ class MetaCWrap(type):
             Prototype.registerType("%s_obj" % type_name, cls.createPythonObject, is_return_type=True, storage_type=storage_type)
 
 
+        if getattr(cls, "CACHE_REFERENCES", False):
+            cls._wrapper_cache = weakref.WeakValueDictionary()
+        elif getattr(cls, "_wrapper_cache", None) is not None:
+            cls._wrapper_cache = None
+
+        if getattr(cls, "CACHE_REFERENCES", False) or getattr(cls, "MEMORY_USAGE", None):
+            free = getattr(cls, "free", None)
+            if free is not None and not getattr(free, "_releases", False):
+                cls.free = releasingFree(free)
+
+        prototype_methods = getattr(cls, "PROTOTYPE_METHODS", False)
+        lazy = getattr(cls, "LAZY_PROTOTYPES", None)
         for key, attr in attrs.items():
             if isinstance(attr, Prototype):
-                attr.resolve()
-                attr.__name__ = key
+                attr._setName(key, "%s.%s" % (name, key))
+                if not (attr.lazy if lazy is None else lazy):
+                    attr.resolve()
+                if prototype_methods and attr.shouldBeBound():
+                    attr.installMethod(cls, key)
@@ -16,8 +16,11 @@
 
 import ctypes
 import inspect
+import os
 import re
 import sys
+import threading
+import weakref
 from types import MethodType
 
 import six
@@ -66,9 +69,99 @@ if six.PY3:
             return result.decode()
 
 
+# Kind of the struct/buffer format characters; used to check that a buffer
+# holds elements of the type a pointer argument expects.
+_FORMAT_KINDS = {}
+for _chars, _kind in (("bhilqn", "i"), ("BHILQN", "u"), ("efdg", "f"), ("?", "b")):
+    _FORMAT_KINDS.update(dict.fromkeys(_chars, _kind))
+
+_NATIVE_BYTE_ORDER = "<" if sys.byteorder == "little" else ">"
+
+
+def _bufferPointer(ctype):
+    """Create a ctypes.POINTER(ctype) type which also accepts buffers.
+
+    Everything accepted by ctypes.POINTER(ctype) is accepted as before. In
+    addition any object supporting the buffer protocol, e.g. a NumPy array,
+    array.array or memoryview, is passed to C as a pointer to its first
+    element without copying. The buffer must be writable, C contiguous and
+    hold elements of the same kind and size as ctype.
+    """
+    pointer_type = ctypes.POINTER(ctype)
+    kind = _FORMAT_KINDS[ctype._type_]
+    itemsize = ctypes.sizeof(ctype)
+
+    def bufferParam(value):
+        try:
+            view = memoryview(value)
+        except TypeError:
+            raise TypeError(
+                "expected %s instance or buffer instead of %s"
+                % (pointer_type.__name__, type(value).__name__)
+            )
+
+        fmt = view.format
+        if fmt[:1] in "@=":
+            fmt = fmt[1:]
+        elif fmt[:1] in "<>!":
+            if fmt[:1].replace("!", ">") != _NATIVE_BYTE_ORDER:
+                raise TypeError("buffer with non-native byte order: %s" % view.format)
+            fmt = fmt[1:]
+        if len(fmt) != 1 or _FORMAT_KINDS.get(fmt) != kind or view.itemsize != itemsize:
+            raise TypeError(
+                "buffer format '%s' does not match %s" % (view.format, ctype.__name__)
+            )
+        if not view.c_contiguous:
+            raise TypeError("buffer must be C contiguous")
+        if view.readonly:
+            raise TypeError("buffer must be writable")
+
+        if view.nbytes == 0:
+            # Nothing to share; still hand C a valid pointer.
+            return ctypes.byref(ctype())
+        return ctypes.byref(ctype.from_buffer(view))
+
+    class BufferPointer(pointer_type):
+        _type_ = ctype
+
+        @classmethod
+        def from_param(cls, value):
+            try:
+                return pointer_type.from_param(value)
+            except TypeError:
+                # ctypes does not apply its array compatibility to the
+                # _as_parameter_ of an object, e.g. a BaseCValueArray.
+                parameter = getattr(value, "_as_parameter_", None)
+                if parameter is not None:
+                    return cls.from_param(parameter)
+                return bufferParam(value)
+
+    BufferPointer.__name__ = pointer_type.__name__
+    return BufferPointer
+
+
 REGISTERED_TYPES = {}
 """:type: dict[str,TypeDefinition]"""
 
+# Parsed signatures keyed by "return type(argument types)", i.e. the
+# normalized prototype without the function name; a string, unlike a tuple,
+# is no object for the garbage collector to track. Only successful parses are
+# cached; a type name can not be registered twice, so an entry never goes
+# stale.
+_SIGNATURE_CACHE = {}
+
+# The first pointers to the C functions looked up so far, {(library handle,
+# function pointer flags): {name: pointer}}; see Prototype._cFunction().
+_FUNCTIONS = {}
+
+# Compiled call factories keyed by their shape, see _callFactory().
+_CALL_FACTORIES = {}
+
+# Serializes resolve() and the installation of the specialized call, so
+# concurrent first calls of a prototype install it once, and never call a
+# target which is not installed yet.
+_RESOLVE_LOCK = threading.RLock()
+
 
 def _registerType(
     type_name,
@@ -88,17 +181,17 @@ def _registerType(
 _registerType("void", None)
 _registerType("void*", ctypes.c_void_p)
 _registerType("uint", ctypes.c_uint)
-_registerType("uint*", ctypes.POINTER(ctypes.c_uint))
+_registerType("uint*", _bufferPointer(ctypes.c_uint))
 _registerType("int", ctypes.c_int)
-_registerType("int*", ctypes.POINTER(ctypes.c_int))
+_registerType("int*", _bufferPointer(ctypes.c_int))
 _registerType("int64", ctypes.c_int64)
-_registerType("int64*", ctypes.POINTER(ctypes.c_int64))
+_registerType("int64*", _bufferPointer(ctypes.c_int64))
 _registerType("size_t", ctypes.c_size_t)
-_registerType("size_t*", ctypes.POINTER(ctypes.c_size_t))
+_registerType("size_t*", _bufferPointer(ctypes.c_size_t))
 _registerType("bool", ctypes.c_bool)
-_registerType("bool*", ctypes.POINTER(ctypes.c_bool))
+_registerType("bool*", _bufferPointer(ctypes.c_bool))
 _registerType("long", ctypes.c_long)
-_registerType("long*", ctypes.POINTER(ctypes.c_long))
+_registerType("long*", _bufferPointer(ctypes.c_long))
 _registerType("char", ctypes.c_char)
 if six.PY2:
     _registerType("char*", ctypes.c_char_p)
@@ -111,9 +204,9 @@ if six.PY3:
         errcheck=CStringHelper.toStr,
     )
 _registerType("float", ctypes.c_float)
-_registerType("float*", ctypes.POINTER(ctypes.c_float))
+_registerType("float*", _bufferPointer(ctypes.c_float))
 _registerType("double", ctypes.c_double)
-_registerType("double*", ctypes.POINTER(ctypes.c_double))
+_registerType("double*", _bufferPointer(ctypes.c_double))
 _registerType("py_object", ctypes.py_object)
 
 PROTOTYPE_PATTERN = (
@@ -127,18 +220,201 @@ class PrototypeError(Exception):
     pass
 
 
+GIL_POLICIES = ("hold", "release")
+
+_FUNCTION_TYPES = {}
+
+
+def _functionType(lib, gil):
+    """The ctypes function pointer class for @lib with the given GIL policy.
+
+    Functions from a CDLL release the GIL during the call, functions from a
+    PyDLL hold it; the difference is only the _FUNCFLAG_PYTHONAPI flag.
+    """
+    flags = lib._func_flags_ & ~ctypes._FUNCFLAG_PYTHONAPI
+    if gil == "hold":
+        flags |= ctypes._FUNCFLAG_PYTHONAPI
+
+    if flags not in _FUNCTION_TYPES:
+
+        class _FuncPtr(ctypes._CFuncPtr):
+            _flags_ = flags
+            _restype_ = ctypes.c_int
+
+        _FUNCTION_TYPES[flags] = _FuncPtr
+    return _FUNCTION_TYPES[flags]
+
+
+# Template for the specialized callables installed by Prototype.resolve(). The
+# generated function takes the C function arguments as plain positional
+# parameters, so the steady state call does not have to pack and unpack
+# *args. Surplus arguments are still passed on to ctypes, as before. The
+# template is compiled once per shape into a factory creating the closure.
+_CALL_TEMPLATE = """\
+def factory(func, convert, errcheck, variadic, argumentError):
+    def call({params}*extra):
+{check}        if extra:
+            return variadic({params}*extra)
+        try:
+            return {result}
+        except ArgumentError as err:
+            raise argumentError(err, ({params})) from err
+    return call
+"""
+
+_BOUND_CHECK = """\
+        if not a0.is_initialized():
+            raise uninitializedError(a0)
+"""
+
+
+def _callFactory(arity, bound, result_kind):
+    key = (arity, bound, result_kind)
+    factory = _CALL_FACTORIES.get(key)
+    if factory is None:
+        params = "".join("a%d, " % index for index in range(arity))
+        result = {
+            "errcheck": "errcheck(func(%s), func, (%s))" % (params, params),
+            "convert": "convert(func(%s))" % params,
+            "plain": "func(%s)" % params,
+        }[result_kind]
+        source = _CALL_TEMPLATE.format(
+            params=params, check=_BOUND_CHECK if bound else "", result=result
+        )
+        namespace = {
+            "ArgumentError": ctypes.ArgumentError,
+            "uninitializedError": _uninitializedError,
+        }
+        exec(compile(source, "<cwrap prototype>", "exec"), namespace)
+        factory = _CALL_FACTORIES[key] = namespace["factory"]
+    return factory
+
+
+# Template for prototypes with output arguments, wrapping the specialized
+# call; r<n> is the byref() of the output value b<n> of the current thread.
+_OUTPUT_TEMPLATE = """\
+def factory(target, local, createBuffers):
+    def call({inputs}):
+        try:
+            buffers = local.buffers
+        except AttributeError:
+            buffers = local.buffers = createBuffers()
+        {buffers} = buffers
+        result = target({arguments})
+        return ({results})
+    return call
+"""
+
+_OUTPUT_FACTORIES = {}
+
+
+def _outputFactory(arity, output_indices, void):
+    key = (arity, output_indices, void)
+    factory = _OUTPUT_FACTORIES.get(key)
+    if factory is None:
+        arguments = []
+        inputs = []
+        for index in range(arity):
+            if index in output_indices:
+                arguments.append("r%d" % output_indices.index(index))
+            else:
+                inputs.append("a%d" % index)
+                arguments.append("a%d" % index)
+        outputs = range(len(output_indices))
+        results = "" if void else "result, "
+        source = _OUTPUT_TEMPLATE.format(
+            inputs=", ".join(inputs),
+            buffers="".join("r%d, b%d, " % (n, n) for n in outputs),
+            arguments=", ".join(arguments),
+            results=results + "".join("b%d.value, " % n for n in outputs),
+        )
+        namespace = {}
+        exec(compile(source, "<cwrap prototype>", "exec"), namespace)
+        factory = _OUTPUT_FACTORIES[key] = namespace["factory"]
+    return factory
+
+
+def _uninitializedError(obj):
+    return ValueError(
+        "Called bound function with uninitialized object of type "
+        f"{type(obj).__name__}"
+    )
+
+
 class Prototype(object):
     pattern = re.compile(PROTOTYPE_PATTERN)
 
-    def __init__(self, lib, prototype, bind=False, allow_attribute_error=False):
+    # Default for MetaCWrap: when lazy, prototypes in a class body are not
+    # resolved when the class is defined, but on first call. Classes can
+    # override this with the LAZY_PROTOTYPES attribute.
+    lazy = os.environ.get("CWRAP_LAZY", "0") not in ("", "0")
+
+    # Executor used for asynchronous calls, None is the default executor of
+    # the running event loop. Can be set per prototype.
+    executor = None
+
+    # Weak references to all prototypes, see _prototypes(). A plain list is
+    # cheaper to add to than a WeakSet; the dead references are dropped when
+    # the list has grown to twice its size after the last pruning.
+    _registry = []
+    _registry_limit = 1024
+
+    # Functions (prototype, target) -> target wrapping the call target of
+    # every resolved prototype; installed by cwrap.instrument.
+    _target_wrappers = []
+
+    # Defaults of the state set by resolve() and installMethod().
+    _func = None
+    _convert = None
+    _errcheck = None
+    _outputs = ()
+    _resolved = False
+    _installed = False
+    _methods = ()
+
+    def __init__(
+        self,
+        lib,
+        prototype,
+        bind=False,
+        allow_attribute_error=False,
+        gil=None,
+        asynchronous=False,
+    ):
         super(Prototype, self).__init__()
+        if gil is not None and gil not in GIL_POLICIES:
+            raise ValueError("The gil policy must be one of %s" % (GIL_POLICIES,))
         self._lib = lib
+        self._gil = gil
         self._prototype = prototype
         self._bind = bind
-        self._func = None
         self.__name__ = prototype
-        self._resolved = False
         self._allow_attribute_error = allow_attribute_error
+        self._asynchronous = asynchronous
+        if asynchronous:
+            self._setCall(self._target)
+
+        registry = Prototype._registry
+        registry.append(weakref.ref(self))
+        if len(registry) > Prototype._registry_limit:
+            Prototype._pruneRegistry()
+
+    @staticmethod
+    def _pruneRegistry():
+        # Deleting from the back in place keeps references appended by other
+        # threads meanwhile.
+        with _RESOLVE_LOCK:
+            registry = Prototype._registry
+            for index in range(len(registry) - 1, -1, -1):
+                if registry[index]() is None:
+                    del registry[index]
+            Prototype._registry_limit = max(1024, 2 * len(registry))
+
+    @staticmethod
+    def _prototypes():
+        """Return a list of all live prototypes."""
+        prototypes = [ref() for ref in list(Prototype._registry)]
+        return [prototype for prototype in prototypes if prototype is not None]
 
     def _parseType(self, type_name):
         """Convert a prototype definition type from string to a ctypes legal type."""
@@ -157,118 +433,485 @@ class Prototype(object):
         return self._bind
 
     def resolve(self):
-        match = re.match(Prototype.pattern, self._prototype)
+        """Look up the C function and parse the signature.
+
+        The specialized call is created on the first call, see _firstCall();
+        most prototypes of a large binding module are never called.
+        """
+        with _RESOLVE_LOCK:
+            self._func = self._resolveFunction()
+            self._resolved = True
+
+    def _install(self):
+        """Resolve if needed and install the specialized call."""
+        with _RESOLVE_LOCK:
+            if not self._installed:
+                if not self._resolved:
+                    self.resolve()
+                self._setCall(self._wrapTarget(self._specialize()))
+                self._installed = True
+
+    def _setName(self, name, qualname):
+        """Name the prototype after the class attribute holding it.
+
+        The instrumentation wrappers take the name when the call target is
+        created, so an already installed target is recreated.
+        """
+        self.__name__ = name
+        self.__qualname__ = qualname
+        if self._installed and self._target_wrappers:
+            with _RESOLVE_LOCK:
+                self._setCall(self._wrapTarget(self._specialize()))
+
+    def _firstCall(self, *args):
+        self._install()
+        return self._target(*args)
+
+    # Until the specialized call is installed as instance attributes, see
+    # _setCall(), the target is the bound _firstCall. Not storing the bound
+    # method keeps a new prototype free of reference cycles.
+    _target = _call = _firstCall
+
+    def _wrapTarget(self, target):
+        if self._func is not None:
+            for wrapper in Prototype._target_wrappers:
+                target = wrapper(self, target)
+        return target
+
+    @classmethod
+    def _respecializeAll(cls):
+        """Recreate the call targets after Prototype._target_wrappers changed."""
+        with _RESOLVE_LOCK:
+            for prototype in cls._prototypes():
+                if prototype._installed:
+                    prototype._setCall(prototype._wrapTarget(prototype._specialize()))
+
+    def _rawFunction(self):
+        """A new pointer to the C function without argtypes, or None.
+
+        Calling it with the values returned by the from_param() of the
+        argtypes does the C call alone, without any argument conversion.
+        """
+        func = self._func
+        try:
+            raw = type(func)((func.__name__, self._lib))
+        except (AttributeError, TypeError):
+            return None
+        raw.restype = func.restype
+        return raw
+
+    @classmethod
+    def resolveAll(cls, strict=False):
+        """Resolve all unresolved prototypes of this class in one go.
+
+        All errors are collected and reported in one PrototypeError, instead
+        of failing on the first one. With strict=True prototypes which could
+        not be resolved, but were allowed to fail with allow_attribute_error,
+        are reported as well. Intended for test suites and CI when the
+        bindings are otherwise resolved lazily.
+        """
+        errors = []
+        for prototype in cls._prototypes():
+            if not isinstance(prototype, cls):
+                continue
+            if not prototype._resolved:
+                try:
+                    prototype.resolve()
+                except (PrototypeError, ValueError) as err:
+                    errors.append("%s: %s" % (prototype._prototype, str(err).strip()))
+                    continue
+            if strict and prototype._func is None:
+                errors.append("%s: could not be resolved" % prototype._prototype)
+
+        if errors:
+            raise PrototypeError(
+                "Failed to resolve %d prototype(s):\n  %s"
+                % (len(errors), "\n  ".join(sorted(errors)))
+            )
+
+    def _setCall(self, target):
+        # The target does the actual (synchronous) call; _call is what calling
+        # the prototype runs, which for an asynchronous prototype offloads the
+        # target to an executor.
+        self._target = target
+        if self._asynchronous:
+            self._call = self._asynchronousCall(target)
+        else:
+            self._call = target
+
+        if self._methods:
+            self._call._prototype = self
+            for owner, name in self._methods:
+                setattr(owner, name, self._call)
+
+    def _asynchronousCall(self, target):
+        # asyncio and concurrent.futures are imported when used, they take
+        # longer to import than all of cwrap.
+        import asyncio
+
+        def call(*args):
+            loop = asyncio.get_running_loop()
+            return loop.run_in_executor(self.executor, target, *args)
+
+        call.__name__ = getattr(target, "__name__", self.__name__)
+        return call
+
+    def acall(self, *args):
+        """Offload a call to the executor, returns an awaitable future.
+
+        Must be called from a running event loop. The arguments are kept
+        alive by the executor until the call has completed. Prototypes
+        created with asynchronous=True do this on every call, which also
+        covers bound methods, e.g. `await obj._load(path)`.
+
+        The event loop is only free to run other tasks while the C function
+        runs if the function releases the GIL, see gil="release".
+        """
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        return loop.run_in_executor(self.executor, self._target, *args)
+
+    def installMethod(self, owner, name):
+        """Install the call target of a bound prototype as a plain method.
+
+        A plain function in the class namespace is called through CPython's
+        method call fast path, so `obj._at(i)` does not allocate a bound
+        method object on every call as the descriptor protocol does. The
+        installed function is replaced whenever the specialized call is
+        installed or recreated; the prototype is kept as its _prototype
+        attribute, e.g. for Class._method._prototype.map().
+        """
+        if not self._bind:
+            raise PrototypeError("Only bound prototypes can be installed as methods")
+        self._methods += ((owner, name),)
+        method = self._call if self._installed else self._firstMethodCall()
+        method._prototype = self
+        setattr(owner, name, method)
+
+    def _firstMethodCall(self):
+        # A plain function, unlike the bound _firstCall, so that the object
+        # is passed on; installing replaces it in the class.
+        def call(*args):
+            self._install()
+            return self._call(*args)
+
+        call.__name__ = self.__name__
+        return call
+
+    def _resolveFunction(self):
+        match = Prototype.pattern.match(self._prototype)
         if not match:
             raise PrototypeError("Illegal prototype definition: %s\n" % self._prototype)
-        else:
-            restype = match.groupdict()["return"]
-            function_name = match.groupdict()["function"]
+        restype, function_name, arguments = match.group("return", "function", "arguments")
+        if self.__name__ == self._prototype:
             self.__name__ = function_name
-            arguments = match.groupdict()["arguments"].split(",")
 
-            try:
-                func = getattr(self._lib, function_name)
-            except AttributeError:
-                if self._allow_attribute_error:
-                    return
-                raise PrototypeError(
-                    "Can not find function: %s in library: %s"
-                    % (function_name, self._lib)
-                )
+        try:
+            symbol = self._symbol(function_name)
+        except AttributeError:
+            if self._allow_attribute_error:
+                return None
+            raise PrototypeError(
+                "Can not find function: %s in library: %s"
+                % (function_name, self._lib)
+            )
 
-            if (
-                not restype in REGISTERED_TYPES
-                or not REGISTERED_TYPES[restype].is_return_type
-            ):
-                sys.stderr.write(
-                    "The type used as return type: %s is not registered as a return type.\n"
-                    % restype
+        signature = self._parseSignature(restype, arguments)
+        if signature is None:
+            return None
+
+        # The return value conversion (storage type and errcheck) is not
+        # installed on the ctypes function, it is applied by the
+        # specialized callable; see _specialize().
+        _, self._convert, self._errcheck, _, self._outputs = signature
+        return self._cFunction(function_name, symbol, signature)
+
+    def _symbol(self, function_name):
+        """Return (function pointer class, pointers) of a C function.
+
+        The symbol is looked up once; the first pointer to the function is
+        kept in the {name: pointer} of the library, see _cFunction(). For a
+        library which is not a ctypes library the function looked up on the
+        library is returned instead.
+        """
+        if not hasattr(self._lib, "_func_flags_"):
+            if self._gil is not None:
+                raise PrototypeError(
+                    "The gil policy requires a ctypes library, not: %s" % self._lib
                 )
+            return getattr(self._lib, function_name)
 
-                return_type, storage_type, errcheck = self._parseType(restype)
-
-                if inspect.isclass(return_type):
-                    sys.stderr.write(
-                        "  Correct type may be: %s_ref or %s_obj.\n"
-                        % (restype, restype)
-                    )
-
-                return None
+        # Without a gil policy the semantics of the library are used; a CDLL
+        # releases the GIL during the call, a PyDLL, e.g. clib.load(...,
+        # gil="hold"), holds it.
+        if self._gil is None:
+            function_type = self._lib._FuncPtr
+        else:
+            function_type = _functionType(self._lib, self._gil)
+
+        key = (self._lib._handle, function_type._flags_)
+        pointers = _FUNCTIONS.get(key)
+        if pointers is None:
+            pointers = _FUNCTIONS[key] = {}
+        if function_name not in pointers:
+            pointers[function_name] = function_type((function_name, self._lib))
+        return function_type, pointers
+
+    def _cFunction(self, function_name, symbol, signature):
+        restype, _, _, argtypes, _ = signature
+        if not isinstance(symbol, tuple):
+            func = symbol
+            func.restype = restype
+            func.argtypes = argtypes
+            return func
+
+        # Prototypes of the same symbol may set different argtypes and
+        # restype, so the first pointer is only shared by prototypes with
+        # the very same restype and argtypes objects, i.e. the same cached
+        # signature; ctypes keeps the objects assigned. The others get a
+        # pointer of their own.
+        function_type, pointers = symbol
+        func = pointers[function_name]
+        if func.argtypes is argtypes and func.restype is restype:
+            return func
+
+        if func.argtypes is not None:
+            func = function_type((function_name, self._lib))
+        func.restype = restype
+        func.argtypes = argtypes
+        # Named like the functions looked up on the library; _rawFunction()
+        # uses the name to get another pointer to the function.
+        func.__name__ = function_name
+        return func
+
+    def _parseSignature(self, restype, arguments):
+        """Return (restype, convert, errcheck, argtypes, outputs) for a prototype.
+
+        The result only depends on the type names, so it is shared by all
+        prototypes with the same shape. Returns None if the return type is
+        not registered as a return type. The outputs are the (index, ctype)
+        of the arguments declared as 'out int*' and similar.
+        """
+        key = "%s(%s)" % (restype, arguments.replace(" ", ""))
+        # A subclass overriding _parseType must see every lookup.
+        cacheable = type(self)._parseType is Prototype._parseType
+        if cacheable:
+            signature = _SIGNATURE_CACHE.get(key)
+            if signature is not None:
+                return signature
+
+        type_definition = REGISTERED_TYPES.get(restype)
+        if type_definition is None or not type_definition.is_return_type:
+            sys.stderr.write(
+                "The type used as return type: %s is not registered as a return type.\n"
+                % restype
+            )
 
             return_type, storage_type, errcheck = self._parseType(restype)
 
-            func.restype = return_type
-
-            if storage_type is not None:
-                func.restype = storage_type
+            if inspect.isclass(return_type):
+                sys.stderr.write(
+                    "  Correct type may be: %s_ref or %s_obj.\n"
+                    % (restype, restype)
+                )
 
-                def returnFunction(result, func, arguments):
-                    return return_type(result)
+            return None
 
-                func.errcheck = returnFunction
+        return_type, storage_type, errcheck = self._parseType(restype)
 
-            if errcheck is not None:
-                func.errcheck = errcheck
+        convert = None
+        if storage_type is not None:
+            convert = return_type
+            return_type = storage_type
 
-            if len(arguments) == 1 and arguments[0].strip() == "":
-                func.argtypes = []
+        outputs = ()
+        if not arguments.strip():
+            argtypes = ()
+        elif "out " in arguments:
+            argtypes, outputs = self._parseOutputArguments(arguments.split(","))
+        else:
+            argtypes = tuple([self._parseType(arg)[0] for arg in arguments.split(",")])
+            if len(argtypes) == 1 and argtypes[0] is None:
+                argtypes = ()
+
+        signature = (return_type, convert, errcheck, argtypes, outputs)
+        if cacheable:
+            _SIGNATURE_CACHE[key] = signature
+        return signature
+
+    def _parseOutputArguments(self, arguments):
+        argtypes = []
+        outputs = []
+        for index, arg in enumerate(arguments):
+            words = arg.split()
+            if len(words) == 2 and words[0] == "out":
+                arg = words[1]
+                argtype = self._parseType(arg)[0]
+                if not (inspect.isclass(argtype) and issubclass(argtype, ctypes._Pointer)):
+                    raise PrototypeError("Output argument must be a pointer type, not: %s" % arg)
+                outputs.append((index, argtype._type_))
             else:
-                argtypes = [self._parseType(arg)[0] for arg in arguments]
-                if len(argtypes) == 1 and argtypes[0] is None:
-                    argtypes = []
-                func.argtypes = argtypes
+                argtype = self._parseType(arg)[0]
+            argtypes.append(argtype)
+        return tuple(argtypes), tuple(outputs)
+
+    def _specialize(self):
+        """Create the callable used for all calls after resolve().
+
+        The callable is compiled for the exact configuration of this
+        prototype: bound or unbound, the arity of the C function and how the
+        return value is converted. That way the steady state path does as
+        little Python work as possible.
+        """
+        func = self._func
+        if func is None:
+            return self._unresolvableCall()
+
+        if self._errcheck is not None:
+            result_kind = "errcheck"
+        elif self._convert is not None:
+            result_kind = "convert"
+        else:
+            result_kind = "plain"
+
+        arity = len(func.argtypes)
+        factory = _callFactory(arity, bool(self._bind and arity), result_kind)
+        call = factory(
+            func,
+            self._convert,
+            self._errcheck,
+            self._variadicCall(),
+            self._argumentError,
+        )
+        if self._outputs:
+            call = self._outputCall(call, arity, func.restype is None)
+        # Named after the C function, e.g. in the TypeError for a wrong
+        # number of arguments.
+        call.__name__ = call.__qualname__ = getattr(func, "__name__", self.__name__)
+        return call
+
+    def _outputCall(self, target, arity, void):
+        """Wrap @target to supply the output arguments and return them.
+
+        The caller passes the input arguments only; the output arguments
+        point into ctypes values allocated once per thread. The result is a
+        tuple of the return value, unless void, and the output values.
+        """
+        outputs = self._outputs
+        local = threading.local()
+
+        def createBuffers():
+            buffers = []
+            for _, ctype in outputs:
+                value = ctype()
+                buffers.extend((ctypes.byref(value), value))
+            return tuple(buffers)
+
+        factory = _outputFactory(arity, tuple(index for index, _ in outputs), void)
+        return factory(target, local, createBuffers)
+
+    def _variadicCall(self):
+        func = self._func
+        convert = self._convert
+        errcheck = self._errcheck
+
+        def call(*args):
+            if self._bind and not args[0].is_initialized():
+                raise _uninitializedError(args[0])
+            try:
+                result = func(*args)
+            except ctypes.ArgumentError as err:
+                raise self._argumentError(err, args) from err
+            if errcheck is not None:
+                return errcheck(result, func, args)
+            if convert is not None:
+                return convert(result)
+            return result
 
-            self._func = func
+        return call
 
-    def __call__(self, *args):
-        if not self._resolved:
-            self.resolve()
-            self._resolved = True
-        if self._func is None:
+    def _unresolvableCall(self):
+        def call(*args):
             if self._allow_attribute_error:
                 raise NotImplementedError(
                     "Function:%s has not been properly resolved" % self.__name__
                 )
             else:
                 raise PrototypeError("Prototype has not been properly resolved")
-        if self._bind and not args[0].is_initialized():
-            raise ValueError(
-                "Called bound function with uninitialized object of type "
-                f"{type(args[0]).__name__}"
+
+        return call
+
+    def _argumentError(self, err, args):
+        # Reraise the exception as TypeError with a suitable message
+        # This way we don't expose ArgumentError which is a member of
+        # ctypes and, as such, just an implementation detail.
+        # ArgumentError.message will look like this
+        #   `argument 4: <type 'exceptions.TypeError'>: wrong type`
+        # The only useful information here is the index of the argument
+        errMsg = err.message if hasattr(err, "message") else str(err)
+        tokens = re.split("[ :]", errMsg)
+        argidx = int(tokens[1]) - 1  # it starts from 1
+        return self._conversionError(argidx, args)
+
+    def _conversionError(self, argidx, args):
+        return TypeError(
+            (
+                "Argument {argidx}: cannot create a {argtype} from the given "
+                "value {actval} ({acttype})"
+            ).format(
+                argtype=self._func.argtypes[argidx],
+                argidx=argidx,
+                actval=repr(args[argidx]),
+                acttype=type(args[argidx]),
             )
+        )
+
+    @property
+    def __call__(self):
+        # Calling a Prototype instance looks up __call__ on the type; as a
+        # property it hands back the specialized callable directly, which
+        # saves a Python frame and the repacking of *args on every call.
+        return self._call
+
+    def map(self, arguments, executor=None, max_workers=None):
+        """Call the prototype concurrently, once for every argument tuple.
+
+        The calls run on @executor, by default a new thread pool with
+        @max_workers threads, and the results are returned as a list in the
+        order of @arguments. For a bound prototype the first element of each
+        tuple is the object. The first exception raised by a call is
+        propagated after all calls have finished or been cancelled; the
+        argument objects are kept alive until then.
+
+        Only functions which release the GIL run in parallel, i.e. functions
+        from a CDLL or prototypes with gil="release".
+        """
+        from concurrent import futures
+
+        arguments = [tuple(args) for args in arguments]
+        if executor is None:
+            with futures.ThreadPoolExecutor(max_workers=max_workers) as pool:
+                return self.map(arguments, executor=pool)
+
+        call = self._target
+        pending = [executor.submit(call, *args) for args in arguments]
         try:
-            return self._func(*args)
-        except ctypes.ArgumentError as err:
-            # Reraise the exception as TypeError with a suitable message
-            # This way we don't expose ArgumentError which is a member of
-            # ctypes and, as such, just an implementation detail.
-            # ArgumentError.message will look like this
-            #   `argument 4: <type 'exceptions.TypeError'>: wrong type`
-            # The only useful information here is the index of the argument
-            errMsg = err.message if hasattr(err, "message") else str(err)
-            tokens = re.split("[ :]", errMsg)
-            argidx = int(tokens[1]) - 1  # it starts from 1
-            raise TypeError(
-                (
-                    "Argument {argidx}: cannot create a {argtype} from the given "
-                    "value {actval} ({acttype})"
-                ).format(
-                    argtype=self._func.argtypes[argidx],
-                    argidx=argidx,
-                    actval=repr(args[argidx]),
-                    acttype=type(args[argidx]),
-                )
-            ) from err
+            return [future.result() for future in pending]
+        except BaseException:
+            for future in pending:
+                future.cancel()
+            futures.wait(pending)
+            raise
 
     def __get__(self, instance, owner):
-        if not self._resolved:
-            self.resolve()
-            self._resolved = True
-        if self.shouldBeBound():
+        # On class access a bound prototype returns itself, e.g. for
+        # Class._method.map(); call it with the object as first argument.
+        if self.shouldBeBound() and instance is not None:
             if six.PY2:
-                return MethodType(self, instance, owner)
+                return MethodType(self._call, instance, owner)
             if six.PY3:
-                return MethodType(self, instance)
+                return MethodType(self._call, instance)
         else:
             return self
 
@@ -276,6 +919,10 @@ class Prototype(object):
         bound = ""
         if self.shouldBeBound():
             bound = ", bind=True"
+        if self._gil is not None:
+            bound += ', gil="%s"' % self._gil
+        if self._asynchronous:
+            bound += ", asynchronous=True"
 
         return 'Prototype("%s"%s)' % (self._prototype, bound)
 
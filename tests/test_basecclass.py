@@ -1,6 +1,8 @@
+import ctypes
 import unittest
 
 from cwrap import BaseCClass
+from cwrap.prototype import REGISTERED_TYPES
 
 
 class BaseCClassTest(unittest.TestCase):
@@ -15,3 +17,159 @@ class BaseCClassTest(unittest.TestCase):
 
         obj._invalidateCPointer( )
         self.assertFalse( obj )
+
+    def test_create_view(self):
+        data = (ctypes.c_double * 4)(1.0, 2.0, 3.0, 4.0)
+        obj = BaseCClass(ctypes.addressof(data))
+
+        view = obj._createView(ctypes.addressof(data), 4, ctypes.c_double)
+        self.assertEqual(view.tolist(), [1.0, 2.0, 3.0, 4.0])
+        self.assertIs(view.obj._parent, obj)
+
+        view[0] = 10.0
+        self.assertEqual(data[0], 10.0)
+
+        pointer = ctypes.cast(data, ctypes.POINTER(ctypes.c_double))
+        self.assertEqual(obj._createView(pointer, 2).tolist(), [10.0, 2.0])
+        self.assertEqual(len(obj._createView(pointer, 0)), 0)
+
+        with self.assertRaises(ValueError):
+            obj._createView(ctypes.addressof(data), 4)
+
+        obj._invalidateCPointer()
+
+    def test_cache_references(self):
+        class Cached(BaseCClass):
+            TYPE_NAME = "cached_references"
+            CACHE_REFERENCES = True
+            freed = []
+
+            def free(self):
+                Cached.freed.append(self._address())
+
+        parent = Cached.createPythonObject(100)
+        child = Cached.createCReference(200, parent=parent)
+        self.assertIs(Cached.createCReference(200, parent=parent), child)
+        self.assertIs(Cached.createCReference(100), parent)
+        self.assertIs(Cached.createPythonObject(100), parent)
+
+        # A reference does not become the owner.
+        owner = Cached.createPythonObject(200)
+        self.assertIsNot(owner, child)
+        self.assertFalse(owner.isReference())
+        self.assertIs(Cached.createCReference(200), owner)
+
+        owner.free()
+        self.assertIsNot(Cached.createCReference(200), owner)
+        owner._invalidateCPointer()
+
+        parent._invalidateCPointer()
+        self.assertIsNot(Cached.createCReference(100), parent)
+
+        class Uncached(Cached):
+            TYPE_NAME = "uncached_references"
+            CACHE_REFERENCES = False
+
+        self.assertIsNot(Uncached.createCReference(300), Uncached.createCReference(300))
+        self.assertIsNone(Uncached._wrapper_cache)
+
+    def test_cached_references_keep_their_parent(self):
+        class CachedChild(BaseCClass):
+            TYPE_NAME = "cached_child"
+            CACHE_REFERENCES = True
+
+            def free(self):
+                pass
+
+        first_parent = CachedChild.createPythonObject(100)
+        second_parent = CachedChild.createPythonObject(101)
+        child = CachedChild.createCReference(200, parent=first_parent)
+        self.assertIs(CachedChild.createCReference(200), child)
+        self.assertIs(child.parent(), first_parent)
+
+        # The address is reused below another parent; the stale wrapper is
+        # not returned, nor is its parent changed.
+        reused = CachedChild.createCReference(200, parent=second_parent)
+        self.assertIsNot(reused, child)
+        self.assertIs(reused.parent(), second_parent)
+        self.assertIs(child.parent(), first_parent)
+        self.assertIs(CachedChild.createCReference(200, parent=second_parent), reused)
+
+    def test_slots(self):
+        freed = []
+
+        class Compact(BaseCClass):
+            TYPE_NAME = "compact_slots"
+            __slots__ = ()
+
+            def free(self):
+                freed.append(self._address())
+
+        self.assertIn("compact_slots", REGISTERED_TYPES)
+        self.assertIn("compact_slots_ref", REGISTERED_TYPES)
+
+        obj = Compact(10)
+        self.assertFalse(hasattr(obj, "__dict__"))
+        with self.assertRaises(AttributeError):
+            obj.attribute = 1
+        self.assertEqual(Compact.from_param(obj).value, 10)
+        self.assertIsNone(Compact.from_param(None).value)
+
+        ref = Compact.createCReference(20, parent=obj)
+        self.assertIs(ref.parent(), obj)
+
+        del ref
+        del obj
+        self.assertEqual(freed, [10])
+
+    def test_from_param(self):
+        obj = BaseCClass(10)
+        param = BaseCClass.from_param(obj)
+        self.assertEqual(param.value, 10)
+        self.assertIsNot(BaseCClass.from_param(obj), param)
+        self.assertIsNone(BaseCClass.from_param(None).value)
+
+        with self.assertRaisesRegex(ValueError, "must be a BaseCClass instance"):
+            BaseCClass.from_param(10)
+
+        obj._invalidateCPointer()
+        self.assertIsNone(BaseCClass.from_param(obj).value)
+
+    def test_cached_from_param(self):
+        class CachedParam(BaseCClass):
+            TYPE_NAME = "cached_param"
+            CACHE_C_PARAM = True
+
+            def free(self):
+                pass
+
+        obj = CachedParam(10)
+        param = CachedParam.from_param(obj)
+        self.assertEqual(param.value, 10)
+        self.assertIs(CachedParam.from_param(obj), param)
+
+        obj._invalidateCPointer()
+        self.assertIsNone(CachedParam.from_param(obj).value)
+
+    def test_cached_from_param_slot(self):
+        class Compact(BaseCClass):
+            TYPE_NAME = "compact_param"
+            __slots__ = ()
+
+            def free(self):
+                pass
+
+        class CompactCachedParam(Compact):
+            TYPE_NAME = "compact_cached_param"
+            __slots__ = ()
+            CACHE_C_PARAM = True
+
+        # Only the classes caching the c_void_p get a slot for it.
+        self.assertEqual(Compact.__slots__, ())
+        self.assertEqual(CompactCachedParam.__slots__, ("_BaseCClass__c_param",))
+
+        obj = CompactCachedParam(10)
+        param = CompactCachedParam.from_param(obj)
+        self.assertIs(CompactCachedParam.from_param(obj), param)
+        obj._invalidateCPointer()
+        self.assertIsNone(CompactCachedParam.from_param(obj).value)
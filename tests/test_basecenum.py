@@ -3,6 +3,8 @@ from cwrap import BaseCEnum, Prototype, load
 import os
 import unittest
 
+import pytest
+
 class BaseCEnumTest(unittest.TestCase):
     def test_base_c_enum(self):
         class enum(BaseCEnum):
@@ -129,3 +131,138 @@ def test_base_c_enum_to_c_int():
 
     c_int_value = ctypes.c_int(NumberEnum.ONE)
     assert c_int_value.value == NumberEnum.ONE
+
+
+def test_duplicate_values_and_names():
+    class Duplicates(BaseCEnum):
+        pass
+
+    Duplicates.addEnum("FIRST", 1)
+    Duplicates.addEnum("ALIAS", 1)
+    Duplicates.addEnum("SECOND", 2)
+    Duplicates.addEnum("SECOND", 3)
+
+    assert Duplicates(1) is Duplicates.FIRST
+    assert (Duplicates.ALIAS | Duplicates.FIRST) is Duplicates.FIRST
+    assert Duplicates.from_string("SECOND").value == 2
+    assert len(Duplicates.enums()) == 4
+
+    with pytest.raises(ValueError):
+        Duplicates.from_string("THIRD")
+    with pytest.raises(ValueError):
+        Duplicates(4)
+    with pytest.raises(NotImplementedError):
+        Duplicates()
+
+
+def test_composite_enums_are_cached():
+    class Flags(BaseCEnum):
+        COMPOSITE_CACHE_SIZE = 2
+
+    Flags.addEnum("A", 1)
+    Flags.addEnum("B", 2)
+    Flags.addEnum("C", 4)
+    Flags.addEnum("D", 8)
+
+    ab = Flags.A | Flags.B
+    assert (Flags.B | Flags.A) is ab
+    assert (ab ^ Flags.C) is (Flags.A + Flags.B + Flags.C)
+    assert Flags.A in ab and Flags.C not in ab
+
+    # The cache is full; new values are still created, but not kept.
+    abd = Flags.A | Flags.B | Flags.D
+    assert abd == 11 and (Flags.A | Flags.B | Flags.D) is not abd
+
+    # Registering a value replaces the cached composite.
+    Flags.addEnum("AB", 3)
+    assert (Flags.A | Flags.B) is Flags.AB
+
+
+def test_enum_arrays():
+    np = pytest.importorskip("numpy")
+
+    class CellType(BaseCEnum):
+        pass
+
+    CellType.addEnum("ACTIVE", 1)
+    CellType.addEnum("INACTIVE", 2)
+    CellType.addEnum("FRACTURE", 4)
+
+    codes = np.array([[4, 1], [2, 1]], dtype=np.int32)
+    enums = CellType.fromArray(codes)
+    assert enums.shape == (2, 2)
+    assert enums[0, 0] is CellType.FRACTURE
+    assert CellType.namesFromArray(codes).tolist() == [["FRACTURE", "ACTIVE"], ["INACTIVE", "ACTIVE"]]
+    with pytest.raises(ValueError):
+        CellType.fromArray([1, 3])
+
+    encoded = CellType.toArray([CellType.INACTIVE, CellType.ACTIVE])
+    assert encoded.dtype == np.int32 and encoded.flags.c_contiguous
+    assert encoded.tolist() == [2, 1]
+    assert CellType.toArray(["FRACTURE", "ACTIVE"]).tolist() == [4, 1]
+    assert CellType.toArray(codes).tolist() == [[4, 1], [2, 1]]
+    with pytest.raises(ValueError):
+        CellType.toArray(["MISSING"])
+    with pytest.raises(ValueError):
+        CellType.toArray([CellType.ACTIVE, 1.5])
+    assert CellType.toArray(np.array([2, 4], dtype=np.int64)).tolist() == [2, 4]
+    assert CellType.toArray([]).tolist() == []
+    with pytest.raises(ValueError):
+        CellType.toArray([7, 2 ** 40])
+    with pytest.raises(ValueError):
+        CellType.toArray([1.9])
+    with pytest.raises(ValueError):
+        CellType.toArray([1, 3])
+
+    mask = CellType.ACTIVE | CellType.FRACTURE
+    assert CellType.hasFlag([5, 1, 4, 2], CellType.ACTIVE).tolist() == [True, True, False, False]
+    assert CellType.hasFlag([5, 1, 4, 2], mask).tolist() == [True, False, False, False]
+
+    CellType.addEnum("HOST", 8)
+    assert CellType.fromArray([8])[0] is CellType.HOST
+
+
+class EnumLibrary(object):
+    """Stands in for a C library with an enum provider function."""
+
+    _name = __file__
+
+    def __init__(self, entries):
+        self.calls = 0
+        self._entries = [(ctypes.create_string_buffer(name), value) for name, value in entries]
+        provider = ctypes.CFUNCTYPE(ctypes.c_void_p, ctypes.c_int, ctypes.POINTER(ctypes.c_int))
+        self.enum_iget = provider(self._iget)
+
+    def _iget(self, index, value):
+        self.calls += 1
+        if index >= len(self._entries):
+            return None
+        name, value.contents.value = self._entries[index]
+        return ctypes.addressof(name)
+
+
+def test_populate_enum(tmpdir):
+    from cwrap.bindingcache import enable_binding_cache
+
+    library = EnumLibrary([(b"READ", 1), (b"WRITE", 2)])
+    cache = enable_binding_cache(library, directory=str(tmpdir))
+
+    class Access(BaseCEnum):
+        pass
+
+    Access.populateEnum(library, "enum_iget")
+    assert [enum.value for enum in Access.enums()] == [1, 2]
+    assert library.calls == 3
+    assert [enum.name for enum in Access.enums()] == ["READ", "WRITE"]
+    assert Access.from_string("READ") is Access.READ
+    assert cache.get("enums", "enum_iget") == [["READ", 1], ["WRITE", 2]]
+
+    class CachedAccess(BaseCEnum):
+        pass
+
+    CachedAccess.populateEnum(library, "enum_iget")
+    assert library.calls == 3
+    assert [enum.name for enum in CachedAccess.enums()] == ["READ", "WRITE"]
+
+    with pytest.raises(ValueError):
+        CachedAccess.populateEnum(library, "missing_iget")
@@ -1,5 +1,5 @@
-from ctypes import c_ubyte, c_double
-from cwrap import BaseCValue, Prototype, load
+from ctypes import c_ubyte, c_double, pointer
+from cwrap import BaseCValue, BaseCValueArray, Prototype, PrototypeError, load
 import os
 
 import unittest
@@ -71,3 +71,59 @@ class BaseCValueTest(unittest.TestCase):
         self.assertIsInstance(sqrt_value, SqrtDouble)
         self.assertEqual(sqrt_value.value( ) , 10)
         
+
+
+class DoubleArray(BaseCValueArray):
+    TYPE_NAME = "test_double_array"
+    DATA_TYPE = c_double
+
+
+class BaseCValueArrayTest(unittest.TestCase):
+    def test_array(self):
+        values = DoubleArray(3)
+        self.assertEqual(len(values), 3)
+        self.assertEqual(values.values(), [0.0, 0.0, 0.0])
+        values[1] = 2.5
+        self.assertEqual(values[1], 2.5)
+        self.assertEqual(values.asPointer()[1], 2.5)
+
+        with self.assertRaises(ValueError):
+            DoubleArray.from_param("not an array")
+
+        class IllegalArray(BaseCValueArray):
+            DATA_TYPE = str
+
+        with self.assertRaises(ValueError):
+            IllegalArray(1)
+
+    def test_not_a_return_type(self):
+        malloc = ForTestPrototype("test_double_array malloc(size_t)")
+        with self.assertRaises(PrototypeError):
+            malloc(64)
+
+        with self.assertRaises(ValueError):
+            DoubleArray(pointer(c_double(1.0)))
+
+    def test_pass_to_c(self):
+        # Both the array type and 'double*' accept the array.
+        memcpy = ForTestPrototype("void* memcpy(test_double_array, double*, size_t)")
+        source = DoubleArray([1.0, 2.0, 3.0])
+        target = DoubleArray(3)
+        memcpy(target, source, 3 * 8)
+
+        view = target.asMemoryview()
+        self.assertEqual(view.tolist(), [1.0, 2.0, 3.0])
+        view[0] = 10.0
+        self.assertEqual(target[0], 10.0)
+
+    def test_numpy(self):
+        try:
+            import numpy
+        except ImportError:
+            self.skipTest("NumPy is not installed")
+
+        values = DoubleArray([1.0, 2.0])
+        array = values.asNumpy()
+        self.assertEqual(array.dtype, numpy.float64)
+        array[1] = 5.0
+        self.assertEqual(values[1], 5.0)
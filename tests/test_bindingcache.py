@@ -0,0 +1,72 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from cwrap import Prototype, load
+from cwrap import bindingcache
+from cwrap.bindingcache import BindingCache, binding_cache, enable_binding_cache, library_path
+
+
+class BindingCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_entries_are_stored_and_reused(self):
+        lib = load("msvcrt" if os.name == "nt" else None)
+        cache = enable_binding_cache(lib, directory=self.directory)
+        if cache is None:
+            self.skipTest("Can not locate the library file")
+        self.assertIs(binding_cache(lib), cache)
+
+        cache.put("enums", "enum_iget", [["READ", 1], ["WRITE", 2]])
+        cache.save()
+        self.assertTrue(os.path.isfile(cache.filename()))
+
+        reloaded = BindingCache.forLibrary(lib, directory=self.directory)
+        self.assertEqual(reloaded.filename(), cache.filename())
+        self.assertEqual(reloaded.get("enums", "enum_iget"), [["READ", 1], ["WRITE", 2]])
+        self.assertIsNone(reloaded.get("enums", "missing_iget"))
+
+    def test_prototypes_are_not_cached(self):
+        lib = load("msvcrt" if os.name == "nt" else None)
+        cache = enable_binding_cache(lib, directory=self.directory)
+        if cache is None:
+            self.skipTest("Can not locate the library file")
+
+        labs = Prototype(lib, "long labs(long)")
+        self.assertEqual(labs(-3), 3)
+        self.assertIsNone(cache.get("prototypes", "long labs(long)"))
+
+    def test_library_without_cache(self):
+        lib = load("msvcrt" if os.name == "nt" else None)
+        self.assertIsNone(binding_cache(lib))
+
+    def test_library_loaded_by_short_name(self):
+        try:
+            lib = load("libz")
+        except ImportError:
+            self.skipTest("No libz.so")
+
+        path = library_path(lib)
+        if path is None and not sys.platform.startswith("linux"):
+            self.skipTest("Can not locate the library file")
+        self.assertTrue(os.path.isfile(path))
+        self.assertEqual(path, os.path.realpath(path))
+
+        cache = enable_binding_cache(lib, directory=self.directory)
+        self.assertIs(binding_cache(lib), cache)
+
+        # Without dlinfo() the file is looked up in /proc/self/maps.
+        linker_path = bindingcache._linkerPath
+        bindingcache._linkerPath = lambda lib: None
+        try:
+            mapped = library_path(lib)
+        finally:
+            bindingcache._linkerPath = linker_path
+        if os.path.isfile("/proc/self/maps"):
+            self.assertEqual(mapped, path)
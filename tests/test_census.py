@@ -0,0 +1,66 @@
+import io
+import os
+
+import pytest
+
+import cwrap
+from cwrap import BaseCClass, Prototype, load
+
+
+class LibCPrototype(Prototype):
+    lib = load("msvcrt" if os.name == "nt" else None)
+
+    def __init__(self, prototype, bind=False):
+        super(LibCPrototype, self).__init__(LibCPrototype.lib, prototype, bind=bind)
+
+
+class CensusString(BaseCClass):
+    TYPE_NAME = "census_string"
+    MEMORY_USAGE = "_len"
+
+    _alloc = LibCPrototype("void* strdup(char*)")
+    _len = LibCPrototype("size_t strlen(census_string)", bind=True)
+    _free = LibCPrototype("void free(census_string)", bind=True)
+
+    def __init__(self, text):
+        super(CensusString, self).__init__(self._alloc(text))
+
+    def free(self):
+        self._free()
+
+
+@pytest.fixture
+def tracking():
+    cwrap.enable_census(record_sites=True)
+    yield
+    cwrap.disable_census()
+
+
+def test_census(tracking):
+    owners = [CensusString("abc"), CensusString("defgh")]
+    refs = [CensusString.createCReference(owners[0]._address(), parent=owners[0])]
+
+    record = cwrap.census()["%s.CensusString" % __name__]
+    assert record.owned == 2
+    assert record.references == 1
+    assert record.bytes == 8
+    assert record.parents["CensusString"] == 1
+    site, count = record.sites.most_common(1)[0]
+    assert __file__ in site and count == 2
+
+    del refs
+    del owners
+    assert "%s.CensusString" % __name__ not in cwrap.census()
+
+
+def test_census_report(tracking):
+    obj = CensusString("abc")
+    stream = io.StringIO()
+    cwrap.census_report(stream)
+    assert "CensusString" in stream.getvalue()
+    assert "bytes: 3" in stream.getvalue()
+
+
+def test_disabled_census():
+    obj = CensusString("abc")
+    assert cwrap.census() == {}
@@ -0,0 +1,159 @@
+import ctypes
+import gc
+import os
+
+import pytest
+
+import cwrap
+from cwrap import BaseCClass, Prototype, load
+from cwrap.deferredfree import configure_deferred_free, pending_frees
+
+
+class LibCPrototype(Prototype):
+    lib = load("msvcrt" if os.name == "nt" else None)
+
+    def __init__(self, prototype, bind=False):
+        super(LibCPrototype, self).__init__(LibCPrototype.lib, prototype, bind=bind)
+
+
+class DeferredBuffer(BaseCClass):
+    TYPE_NAME = "deferred_buffer"
+    DEFERRED_FREE = "_free"
+
+    _alloc = LibCPrototype("void* malloc(size_t)")
+    _free = LibCPrototype("void free(deferred_buffer)", bind=True)
+
+    def __init__(self):
+        super(DeferredBuffer, self).__init__(self._alloc(16))
+
+    def free(self):
+        self._free()
+
+
+class DeferredMethodBuffer(DeferredBuffer):
+    TYPE_NAME = "deferred_method_buffer"
+    PROTOTYPE_METHODS = True
+
+    _free = LibCPrototype("void free(deferred_method_buffer)", bind=True)
+
+
+class BulkLibrary(object):
+    """Stands in for a C library with a bulk free function."""
+
+    def __init__(self):
+        self.freed = []
+        self.calls = 0
+        self.free_many = ctypes.CFUNCTYPE(None, ctypes.c_void_p, ctypes.c_int)(self._freeMany)
+
+    def _freeMany(self, address, count):
+        self.calls += 1
+        self.freed.extend((ctypes.c_void_p * count).from_address(address))
+
+
+BULK_LIBRARY = BulkLibrary()
+
+
+class BulkFreed(BaseCClass):
+    TYPE_NAME = "bulk_freed"
+    BULK_FREE = "_free_many"
+
+    _free_many = Prototype(BULK_LIBRARY, "void free_many(void*, int)")
+
+    def free(self):
+        raise AssertionError("free() should not be called for collected objects")
+
+
+class FailingLibrary(object):
+    """Stands in for a C library whose bulk free function fails."""
+
+    @staticmethod
+    def free_many(address, count):
+        raise OSError("free_many failed")
+
+
+class FailingBulkFreed(BaseCClass):
+    TYPE_NAME = "failing_bulk_freed"
+    BULK_FREE = "_free_many"
+
+    _free_many = Prototype(FailingLibrary(), "void free_many(void*, int)")
+
+    def free(self):
+        pass
+
+
+class MissingFree(BaseCClass):
+    TYPE_NAME = "missing_free"
+    DEFERRED_FREE = "_no_such_free"
+
+    def free(self):
+        pass
+
+
+@pytest.fixture
+def threshold():
+    cwrap.flush_frees()
+    yield configure_deferred_free
+    configure_deferred_free(threshold=1000)
+    cwrap.flush_frees()
+
+
+def test_deferred_free(threshold):
+    threshold(threshold=3)
+    objects = [DeferredBuffer() for _ in range(2)]
+    del objects
+    gc.collect()
+    assert pending_frees() == 2
+
+    obj = DeferredBuffer()
+    del obj
+    assert pending_frees() == 0
+
+
+def test_deferred_free_of_prototype_methods(threshold):
+    objects = [DeferredMethodBuffer() for _ in range(2)]
+    del objects
+    gc.collect()
+    assert pending_frees() == 2
+
+    cwrap.flush_frees()
+    assert pending_frees() == 0
+
+
+def test_bulk_free(threshold):
+    objects = [BulkFreed(address) for address in (16, 32, 48)]
+    del objects
+    assert pending_frees() == 3
+
+    cwrap.flush_frees()
+    assert pending_frees() == 0
+    assert BULK_LIBRARY.calls == 1
+    assert sorted(BULK_LIBRARY.freed) == [16, 32, 48]
+
+
+def test_failed_frees_are_reported(threshold):
+    calls = BULK_LIBRARY.calls
+    objects = [FailingBulkFreed(16), MissingFree(32), BulkFreed(80), BulkFreed(96)]
+    del objects
+    assert pending_frees() == 4
+
+    with pytest.warns(RuntimeWarning) as record:
+        cwrap.flush_frees()
+    messages = sorted(str(warning.message) for warning in record)
+    assert "Could not free 1 FailingBulkFreed object(s): free_many failed" in messages
+    assert any(message.startswith("Could not free 1 MissingFree object(s)") for message in messages)
+
+    # The other pointers are freed anyway.
+    assert pending_frees() == 0
+    assert BULK_LIBRARY.calls == calls + 1
+    assert sorted(BULK_LIBRARY.freed[-2:]) == [80, 96]
+
+
+def test_references_are_not_queued(threshold):
+    ref = BulkFreed.createCReference(64)
+    del ref
+    assert pending_frees() == 0
+
+
+def test_invalid_threshold():
+    with pytest.raises(ValueError):
+        configure_deferred_free(threshold=0)
@@ -0,0 +1,160 @@
+import csv
+import io
+import json
+import os
+
+import pytest
+
+import cwrap
+from cwrap import BaseCClass, Prototype, load
+
+
+class LibCPrototype(Prototype):
+    lib = load("msvcrt" if os.name == "nt" else None)
+
+    def __init__(self, prototype, bind=False):
+        super(LibCPrototype, self).__init__(LibCPrototype.lib, prototype, bind=bind)
+
+
+class Instrumented(BaseCClass):
+    TYPE_NAME = "instrumented"
+    _labs = LibCPrototype("long labs(long)")
+    _strlen = LibCPrototype("size_t strlen(char*)")
+
+    def __init__(self):
+        super(Instrumented, self).__init__(1)
+
+    def free(self):
+        pass
+
+
+@pytest.fixture
+def statistics():
+    cwrap.reset_stats()
+    cwrap.enable_stats()
+    yield
+    cwrap.disable_stats()
+    cwrap.reset_stats()
+
+
+def test_stats_are_recorded(statistics):
+    assert Instrumented._labs(-3) == 3
+    assert Instrumented._labs(4) == 4
+    assert Instrumented._strlen("abc") == 3
+
+    records = cwrap.stats()
+    labs = records["Instrumented._labs"]
+    assert labs.count == 2
+    assert labs.total >= labs.max > 0
+    assert labs.total == pytest.approx(labs.convert + labs.call + labs.result)
+    assert labs.convert > 0 and labs.call > 0
+    assert records["Instrumented._strlen"].count == 1
+
+
+def test_conversion_errors_are_unchanged(statistics):
+    with pytest.raises(TypeError, match="Argument 0"):
+        Instrumented._labs("not a number")
+
+
+def test_disable_stats():
+    cwrap.reset_stats()
+    cwrap.enable_stats()
+    Instrumented._labs(-1)
+    cwrap.disable_stats()
+    Instrumented._labs(-1)
+
+    assert cwrap.stats()["Instrumented._labs"].count == 1
+    cwrap.reset_stats()
+    assert cwrap.stats() == {}
+
+
+def test_dump_stats(statistics, tmpdir):
+    Instrumented._labs(-5)
+
+    filename = str(tmpdir.join("stats.json"))
+    cwrap.dump_stats(filename)
+    with open(filename) as f:
+        records = json.load(f)
+    assert records[0]["name"] == "Instrumented._labs"
+    assert records[0]["count"] == 1
+
+    stream = io.StringIO()
+    cwrap.dump_stats(stream, format="csv")
+    rows = list(csv.DictReader(io.StringIO(stream.getvalue())))
+    assert rows[0]["name"] == "Instrumented._labs"
+
+    with pytest.raises(ValueError):
+        cwrap.dump_stats(stream, format="xml")
+
+
+@pytest.fixture
+def tracing():
+    cwrap.enable_tracing()
+    yield
+    cwrap.disable_tracing()
+    cwrap.clear_trace()
+
+
+def test_prototypes_defined_after_enabling_are_named(statistics, tracing):
+    class LateInstrumented(BaseCClass):
+        TYPE_NAME = "late_instrumented"
+        PROTOTYPE_METHODS = True
+        _labs = LibCPrototype("long labs(late_instrumented)", bind=True)
+        _abs = LibCPrototype("int abs(int)")
+
+        # Installed before the class exists.
+        assert _abs(-1) == 1
+
+        def free(self):
+            pass
+
+    assert LateInstrumented(3)._labs() == 3
+    assert LateInstrumented._abs(-2) == 2
+
+    records = cwrap.stats()
+    assert records["LateInstrumented._labs"].count == 1
+    assert records["LateInstrumented._abs"].count == 1
+    assert "labs" not in records
+
+    calls = [event for event in cwrap.instrument.trace_events() if event["ph"] == "X"]
+    assert [event["name"] for event in calls][-2:] == [
+        "LateInstrumented._labs",
+        "LateInstrumented._abs",
+    ]
+
+
+def test_trace_events(tracing):
+    Instrumented._labs(-2)
+    Instrumented._strlen("ab")
+
+    stream = io.StringIO()
+    cwrap.dump_trace(stream)
+    events = json.loads(stream.getvalue())["traceEvents"]
+    calls = [event for event in events if event["ph"] == "X"]
+    assert [event["name"] for event in calls] == [
+        "Instrumented._labs",
+        "Instrumented._strlen",
+    ]
+    assert calls[0]["args"]["class"] == "Instrumented"
+    assert calls[0]["dur"] >= 0
+    assert any(event["ph"] == "M" for event in events)
+
+
+def test_trace_sampling_and_ring_buffer():
+    cwrap.enable_tracing(sample=10, buffer_size=5)
+    try:
+        for _ in range(100):
+            Instrumented._labs(-1)
+        assert len(cwrap.instrument.trace_events()) == 5 + 1
+
+        cwrap.enable_tracing(sample=10)
+        for _ in range(100):
+            Instrumented._labs(-1)
+        calls = [e for e in cwrap.instrument.trace_events() if e["ph"] == "X"]
+        assert len(calls) == 10
+    finally:
+        cwrap.disable_tracing()
+        cwrap.clear_trace()
+
+    with pytest.raises(ValueError):
+        cwrap.enable_tracing(sample=0)
@@ -0,0 +1,84 @@
+import os
+import tracemalloc
+
+import pytest
+
+import cwrap
+from cwrap import BaseCClass, Prototype, load
+from cwrap.memory import TRACEMALLOC_DOMAIN, total_tracked_memory
+
+
+class LibCPrototype(Prototype):
+    lib = load("msvcrt" if os.name == "nt" else None)
+
+    def __init__(self, prototype, bind=False):
+        super(LibCPrototype, self).__init__(LibCPrototype.lib, prototype, bind=bind)
+
+
+class SizedString(BaseCClass):
+    TYPE_NAME = "sized_string"
+    MEMORY_USAGE = "_len"
+
+    _alloc = LibCPrototype("void* strdup(char*)")
+    _len = LibCPrototype("size_t strlen(sized_string)", bind=True)
+    _free = LibCPrototype("void free(sized_string)", bind=True)
+
+    def __init__(self, text):
+        super(SizedString, self).__init__(self._alloc(text))
+
+    def free(self):
+        self._free()
+        self._invalidateCPointer()
+
+
+NAME = "%s.SizedString" % __name__
+
+
+@pytest.fixture
+def tracking():
+    cwrap.enable_memory_tracking()
+    yield
+    cwrap.disable_memory_tracking()
+
+
+def test_tracked_memory(tracking):
+    a = SizedString("x" * 100)
+    b = SizedString("y" * 50)
+    ref = SizedString.createCReference(a._address(), parent=a)
+    assert cwrap.tracked_memory() == {NAME: 150}
+
+    a.free()
+    assert cwrap.tracked_memory() == {NAME: 50}
+
+    del b
+    assert cwrap.tracked_memory() == {}
+    assert total_tracked_memory() == 0
+
+
+def test_tracemalloc_domain(tracking):
+    tracemalloc.start()
+    try:
+        obj = SizedString("z" * 1000)
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.DomainFilter(True, TRACEMALLOC_DOMAIN)]
+        )
+        assert sum(stat.size for stat in snapshot.statistics("filename")) == 1000
+        del obj
+    finally:
+        tracemalloc.stop()
+
+
+def test_memory_budget(tracking):
+    cwrap.set_memory_budget(100)
+    keep = SizedString("x" * 60)
+    with pytest.raises(MemoryError):
+        SizedString("x" * 60)
+    assert cwrap.tracked_memory() == {NAME: 60}
+
+    cwrap.set_memory_budget(None)
+    SizedString("x" * 60)
+
+
+def test_budget_requires_tracking():
+    with pytest.raises(ValueError):
+        cwrap.set_memory_budget(100)
@@ -1,7 +1,18 @@
-from cwrap import BaseCClass, Prototype, load
+import array
+import asyncio
+import ctypes
+import inspect
 import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent import futures
+
 import pytest
 
+from cwrap import BaseCClass, Prototype, PrototypeError, load
+
 
 class LibCPrototype(Prototype):
     lib = load("msvcrt" if os.name == "nt" else None)
@@ -27,3 +38,369 @@ class BadInitialization(BaseCClass):
 def test_that_unitialized_is_raised():
     with pytest.raises(ValueError, match="uninitialized"):
         _ = BadInitialization()
+
+
+class Specialized(BaseCClass):
+    TYPE_NAME = "specialized"
+    _labs = LibCPrototype("long labs(specialized)", bind=True)
+    _strchr = LibCPrototype("char* strchr(char*, int)", bind=False)
+
+    def free(self):
+        pass
+
+
+def test_that_specialized_calls_keep_conversions_and_errors():
+    obj = Specialized(42)
+    assert obj._labs() == 42
+    assert Specialized._strchr("a,b", ord(",")) == ",b"
+    assert Specialized._strchr("a,b", ord("x")) is None
+
+    with pytest.raises(TypeError, match="Argument 0"):
+        Specialized._strchr(1.5, ord(","))
+
+
+def test_that_bound_prototype_is_returned_on_class_access():
+    # Earlier versions raised TypeError on class access of a bound prototype.
+    assert isinstance(Specialized.__dict__["_labs"], Prototype)
+    assert Specialized._labs is Specialized.__dict__["_labs"]
+    assert Specialized._labs(Specialized(7)) == 7
+
+
+def test_that_wrong_argument_counts_name_the_c_function():
+    labs = LibCPrototype("long labs(long)", bind=False)
+    with pytest.raises(TypeError, match=r"^labs\(\) missing 1 required"):
+        labs()
+
+    with pytest.raises(TypeError, match=r"^labs\(\) missing 1 required"):
+        Specialized._labs()
+
+
+class MethodSpecialized(BaseCClass):
+    TYPE_NAME = "method_specialized"
+    PROTOTYPE_METHODS = True
+    _labs = LibCPrototype("long labs(method_specialized)", bind=True)
+    _strchr = LibCPrototype("char* strchr(char*, int)", bind=False)
+
+    def free(self):
+        pass
+
+
+def test_that_bound_prototypes_can_be_installed_as_methods():
+    assert inspect.isfunction(MethodSpecialized.__dict__["_labs"])
+    assert isinstance(MethodSpecialized.__dict__["_strchr"], Prototype)
+
+    obj = MethodSpecialized(42)
+    assert obj._labs() == 42
+
+    prototype = MethodSpecialized._labs._prototype
+    assert isinstance(prototype, Prototype)
+    assert prototype.map([(obj,)]) == [42]
+    assert "labs" in repr(prototype)
+
+    uninitialized = MethodSpecialized.__new__(MethodSpecialized)
+    with pytest.raises(ValueError, match="uninitialized"):
+        uninitialized._labs()
+
+
+class LazyMethods(BaseCClass):
+    TYPE_NAME = "lazy_methods"
+    LAZY_PROTOTYPES = True
+    PROTOTYPE_METHODS = True
+    _alloc = LibCPrototype("void* malloc(size_t)", bind=False)
+    _memset = LibCPrototype("void* memset(lazy_methods, int, size_t)", bind=True)
+    _free = LibCPrototype("void free(lazy_methods)", bind=True)
+    freed = []
+
+    def __init__(self):
+        super(LazyMethods, self).__init__(self._alloc(16))
+
+    def free(self):
+        self._free()
+        LazyMethods.freed.append(True)
+
+
+def test_that_lazy_prototypes_can_be_installed_as_methods():
+    memset = LazyMethods.__dict__["_memset"]
+    assert inspect.isfunction(memset)
+
+    obj = LazyMethods()
+    assert obj._memset(0, 16) == obj._address()
+    assert LazyMethods.__dict__["_memset"] is not memset
+    assert obj._memset(0, 16) == obj._address()
+
+    del obj
+    assert LazyMethods.freed == [True]
+
+
+class LazyLibCPrototype(LibCPrototype):
+    lazy = True
+
+
+class LazyMissing(BaseCClass):
+    TYPE_NAME = "lazy_missing"
+    _labs = LazyLibCPrototype("long labs(lazy_missing)", bind=True)
+    _missing = LazyLibCPrototype("void cwrap_missing_function(lazy_missing)", bind=True)
+    _unknown = LazyLibCPrototype("long labs(no_such_type)", bind=False)
+
+    def free(self):
+        pass
+
+
+def test_that_lazy_prototypes_are_resolved_on_first_call():
+    labs = LazyMissing.__dict__["_labs"]
+    assert not labs._resolved
+    assert LazyMissing(42)._labs() == 42
+    assert labs._resolved
+
+    with pytest.raises(PrototypeError, match="cwrap_missing_function"):
+        LazyMissing(42)._missing()
+
+
+def test_that_the_specialized_call_is_installed_on_first_call():
+    labs = LibCPrototype("long labs(long)", bind=False)
+    labs.resolve()
+    assert not labs._installed
+    assert labs(-1) == 1
+    assert labs._installed
+
+
+def test_that_resolve_all_reports_every_error():
+    with pytest.raises(PrototypeError) as err:
+        LazyLibCPrototype.resolveAll()
+
+    assert "cwrap_missing_function" in str(err.value)
+    assert "Unknown type: no_such_type" in str(err.value)
+
+
+def test_that_strict_resolve_all_reports_allowed_missing_functions():
+    class OptionalLibCPrototype(Prototype):
+        lazy = True
+
+    optional = OptionalLibCPrototype(
+        LibCPrototype.lib, "void cwrap_optional_missing(int)", allow_attribute_error=True
+    )
+
+    OptionalLibCPrototype.resolveAll()
+    with pytest.raises(PrototypeError, match="cwrap_optional_missing"):
+        OptionalLibCPrototype.resolveAll(strict=True)
+
+
+def test_that_lazy_prototypes_can_be_enabled_per_class():
+    class LazyClass(BaseCClass):
+        TYPE_NAME = "lazy_class"
+        LAZY_PROTOTYPES = True
+        _missing = LibCPrototype("void cwrap_lazy_class_missing(lazy_class)", bind=True)
+
+    assert not LazyClass.__dict__["_missing"]._resolved
+
+
+def test_that_signature_cache_is_shared():
+    from cwrap.prototype import _SIGNATURE_CACHE
+
+    first = LibCPrototype("long labs(long)", bind=False)
+    second = LibCPrototype("long  labs( long )", bind=False)
+    first.resolve()
+    second.resolve()
+    assert first._func.argtypes == second._func.argtypes
+    assert first._func is second._func
+    assert "long(long)" in _SIGNATURE_CACHE
+
+
+def test_that_other_signatures_get_their_own_function_pointer():
+    as_long = LibCPrototype("long labs(long)", bind=False)
+    as_int = LibCPrototype("int labs(int)", bind=False)
+    as_long.resolve()
+    as_int.resolve()
+    assert as_long._func is not as_int._func
+    assert as_long._func.argtypes == (ctypes.c_long,)
+    assert as_int._func.argtypes == (ctypes.c_int,)
+    assert as_long(-5) == 5
+    assert as_int(-7) == 7
+
+
+def test_that_failed_signatures_are_not_cached():
+    from cwrap.prototype import _SIGNATURE_CACHE
+
+    early = LibCPrototype("long labs(late_type)", bind=False)
+    with pytest.raises(ValueError, match="Unknown type: late_type"):
+        early.resolve()
+    assert "long(late_type)" not in _SIGNATURE_CACHE
+
+    Prototype.registerType("late_type", ctypes.c_long)
+    early.resolve()
+    assert early(-2) == 2
+
+
+def test_that_pointer_arguments_accept_buffers():
+    modf = LibCPrototype("double modf(double, double*)", bind=False)
+    frexp = LibCPrototype("double frexp(double, int*)", bind=False)
+
+    integral = array.array("d", [0.0])
+    assert modf(3.5, integral) == 0.5
+    assert integral[0] == 3.0
+
+    exponent = array.array("i", [0])
+    assert frexp(8.0, memoryview(exponent)) == 0.5
+    assert exponent[0] == 4
+
+    # Plain ctypes arguments are accepted as before.
+    value = ctypes.c_double()
+    modf(2.25, ctypes.byref(value))
+    assert value.value == 2.0
+
+    with pytest.raises(TypeError):
+        modf(3.5, array.array("f", [0.0]))
+
+    with pytest.raises(TypeError):
+        modf(3.5, memoryview(array.array("d", [0.0, 0.0, 0.0]))[::2])
+
+    with pytest.raises(TypeError):
+        modf(3.5, memoryview(bytes(8)).cast("d"))
+
+
+def test_that_pointer_arguments_accept_numpy_arrays():
+    np = pytest.importorskip("numpy")
+    modf = LibCPrototype("double modf(double, double*)", bind=False)
+
+    integral = np.zeros(10)
+    assert modf(7.25, integral[2:]) == 0.25
+    assert integral[2] == 7.0
+
+    with pytest.raises(TypeError):
+        modf(7.25, np.zeros(10, dtype=np.int64))
+
+
+def test_gil_policy():
+    hold = Prototype(LibCPrototype.lib, "long labs(long)", gil="hold")
+    release = Prototype(LibCPrototype.lib, "long labs(long)", gil="release")
+    assert hold(-3) == 3
+    assert release(-3) == 3
+    assert hold._func._flags_ & ctypes._FUNCFLAG_PYTHONAPI
+    assert not release._func._flags_ & ctypes._FUNCFLAG_PYTHONAPI
+    assert 'gil="hold"' in repr(hold)
+
+    with pytest.raises(ValueError):
+        Prototype(LibCPrototype.lib, "long labs(long)", gil="sometimes")
+
+
+def test_library_gil_default():
+    lib = load("msvcrt" if os.name == "nt" else None, gil="hold")
+    assert isinstance(lib, ctypes.PyDLL)
+    labs = Prototype(lib, "long labs(long)")
+    assert labs(-3) == 3
+    assert labs._func._flags_ & ctypes._FUNCFLAG_PYTHONAPI
+
+
+def test_map():
+    labs = LibCPrototype("long labs(long)", bind=False)
+    assert labs.map([(-n,) for n in range(100)], max_workers=4) == list(range(100))
+
+    with pytest.raises(TypeError):
+        labs.map([(-1,), ("SPAM",), (-3,)], max_workers=2)
+
+    bound = Specialized.__dict__["_labs"]
+    objects = [Specialized(n) for n in range(1, 20)]
+    with futures.ThreadPoolExecutor(max_workers=3) as executor:
+        assert bound.map([(obj,) for obj in objects], executor=executor) == list(range(1, 20))
+
+
+class SlowResolvePrototype(Prototype):
+    def _specialize(self):
+        # Widens the window between resolving the function and installing
+        # the specialized call.
+        time.sleep(0.01)
+        return super(SlowResolvePrototype, self)._specialize()
+
+
+def test_concurrent_first_calls():
+    labs = SlowResolvePrototype(LibCPrototype.lib, "long labs(long)")
+    assert labs.map([(-n,) for n in range(8)], max_workers=8) == list(range(8))
+
+
+class AsyncLibCPrototype(Prototype):
+    def __init__(self, prototype, bind=False):
+        super(AsyncLibCPrototype, self).__init__(
+            LibCPrototype.lib, prototype, bind=bind, asynchronous=True
+        )
+
+
+class Asynchronous(BaseCClass):
+    TYPE_NAME = "asynchronous"
+    _labs = AsyncLibCPrototype("long labs(asynchronous)", bind=True)
+
+    def free(self):
+        pass
+
+
+COMPARE = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_int))
+
+
+def test_asynchronous_prototypes():
+    qsort = AsyncLibCPrototype("void qsort(void*, size_t, size_t, void*)")
+    labs = LibCPrototype("long labs(long)", bind=False)
+
+    # The first comparison of every qsort() call waits until four calls are
+    # running at the same time; calls run one after the other break the
+    # barrier.
+    barrier = threading.Barrier(4, timeout=10)
+    waited = threading.local()
+
+    @COMPARE
+    def compare(a, b):
+        if not getattr(waited, "done", False):
+            waited.done = True
+            barrier.wait()
+        return a[0] - b[0]
+
+    arrays = [(ctypes.c_int * 2)(2, 1) for _ in range(4)]
+
+    async def main():
+        assert await Asynchronous(42)._labs() == 42
+        assert await labs.acall(-3) == 3
+
+        uninitialized = Asynchronous.__new__(Asynchronous)
+        with pytest.raises(ValueError, match="uninitialized"):
+            await uninitialized._labs()
+
+        size = ctypes.sizeof(ctypes.c_int)
+        await asyncio.gather(*[qsort(array, 2, size, compare) for array in arrays])
+
+    asyncio.run(main())
+    assert not barrier.broken
+    assert [list(array) for array in arrays] == [[1, 2]] * 4
+
+
+def test_output_arguments():
+    frexp = LibCPrototype("double frexp(double, out int*)", bind=False)
+    assert frexp(8.0) == (0.5, 4)
+    assert frexp(0.75) == (0.75, 0)
+
+    modf = LibCPrototype("void modf(double, out double*)", bind=False)
+    assert modf(2.25) == (2.0,)
+
+    with pytest.raises(TypeError):
+        frexp(1.0, 2.0)
+    with pytest.raises(TypeError, match="Argument 0"):
+        frexp("not a number")
+
+    # Every thread gets its own output values.
+    results = frexp.map([(float(2 ** n),) for n in range(64)], max_workers=4)
+    assert results == [(0.5, n + 1) for n in range(64)]
+
+
+def test_output_argument_must_be_pointer():
+    with pytest.raises(PrototypeError, match="pointer"):
+        LibCPrototype("int abs(out int)", bind=False).resolve()
+
+
+def test_that_import_leaves_out_the_slow_modules():
+    # asyncio, concurrent.futures and the binding cache modules are imported
+    # when used.
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    source = (
+        "import sys; sys.path.insert(0, %r); import cwrap; "
+        "print(' '.join(sorted(sys.modules)))" % root
+    )
+    modules = subprocess.check_output([sys.executable, "-c", source]).decode().split()
+    for name in ("asyncio", "concurrent.futures", "cwrap.bindingcache", "hashlib", "tempfile"):
+        assert name not in modules